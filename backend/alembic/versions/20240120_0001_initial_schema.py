@@ -0,0 +1,90 @@
+"""
+初期スキーマ（init_dbのcreate_allで作成されていたテーブル）
+
+既存のDBはこのリビジョンとしてstampしてからupgradeする（init_dbが自動で行う）
+
+Revision ID: 0001
+Revises:
+Create Date: 2024-01-20 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "stores",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("url", sa.String(255), nullable=False),
+        sa.Column("area", sa.String(50), nullable=False),
+        sa.Column("open_time", sa.String(5), nullable=False),
+        sa.Column("close_time", sa.String(5), nullable=False),
+        sa.Column("closed_days", sa.Text()),
+        sa.Column("selectors", sa.Text(), nullable=False),
+        sa.Column("scraping_config", sa.Text()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+    op.create_table(
+        "girls",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("store_id", sa.String(), sa.ForeignKey("stores.id"), nullable=False),
+        sa.Column("name", sa.String(50), nullable=False),
+        sa.Column("image_url", sa.String(255)),
+        sa.Column("local_image_path", sa.String(255)),
+        sa.Column("status", sa.String(10)),
+        sa.Column("first_seen", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("last_seen", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("profile_data", sa.Text()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("idx_girls_store_name", "girls", ["store_id", "name"])
+    op.create_index("idx_girls_status", "girls", ["status"])
+
+    op.create_table(
+        "shifts",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("store_id", sa.String(), sa.ForeignKey("stores.id"), nullable=False),
+        sa.Column("girl_id", sa.Integer(), sa.ForeignKey("girls.id"), nullable=False),
+        sa.Column("date", sa.String(10), nullable=False),
+        sa.Column("start_time", sa.String(5), nullable=False),
+        sa.Column("end_time", sa.String(5), nullable=False),
+        sa.Column("shift_type", sa.String(20)),
+        sa.Column("notes", sa.Text()),
+        sa.Column("scraped_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("idx_shifts_date", "shifts", ["date"])
+    op.create_index("idx_shifts_store_date", "shifts", ["store_id", "date"])
+    op.create_index("idx_shifts_girl_date", "shifts", ["girl_id", "date"])
+
+    op.create_table(
+        "scraping_logs",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("store_id", sa.String(), sa.ForeignKey("stores.id"), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("girls_found", sa.Integer()),
+        sa.Column("shifts_found", sa.Integer()),
+        sa.Column("error_message", sa.Text()),
+        sa.Column("execution_time", sa.Integer()),
+        sa.Column("started_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("completed_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("idx_scraping_logs_store_date", "scraping_logs", ["store_id", "started_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("scraping_logs")
+    op.drop_table("shifts")
+    op.drop_table("girls")
+    op.drop_table("stores")
@@ -0,0 +1,146 @@
+"""
+シフトの日付・時刻を型付きカラムに変更
+
+- date: String(10) -> Date（SQLiteは "YYYY-MM-DD" 文字列のまま）
+- start_time / end_time: String(5) -> start_minutes / end_minutes（勤務日0:00からの分）
+  終了が開始以前のシフトは翌日終了として1440分を加算する
+- インデックスを (date, start_minutes) / (store_id, date, start_minutes) に置き換える
+
+日付・時刻として解釈できない行は表現できないため削除する
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-01-21 00:00:00
+"""
+
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+MINUTES_PER_DAY = 24 * 60
+BATCH_SIZE = 5000
+
+shifts = sa.table(
+    "shifts",
+    sa.column("id", sa.Integer),
+    sa.column("date", sa.String),
+    sa.column("start_time", sa.String),
+    sa.column("end_time", sa.String),
+    sa.column("start_minutes", sa.SmallInteger),
+    sa.column("end_minutes", sa.SmallInteger),
+)
+
+
+def _to_minutes(value: str) -> int:
+    hours, minutes = value.strip().split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _to_time(minutes: int) -> str:
+    minutes %= MINUTES_PER_DAY
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    with op.batch_alter_table("shifts") as batch_op:
+        batch_op.add_column(sa.Column("start_minutes", sa.SmallInteger()))
+        batch_op.add_column(sa.Column("end_minutes", sa.SmallInteger()))
+
+    # 既存データを変換（日付は "YYYY-MM-DD" に正規化）
+    rows = bind.execute(
+        sa.select(shifts.c.id, shifts.c.date, shifts.c.start_time, shifts.c.end_time)
+    ).all()
+    updates, invalid_ids = [], []
+    for shift_id, date, start_time, end_time in rows:
+        try:
+            normalized_date = datetime.strptime(date.strip(), "%Y-%m-%d").date().isoformat()
+            start_minutes = _to_minutes(start_time)
+            end_minutes = _to_minutes(end_time)
+        except (ValueError, AttributeError):
+            invalid_ids.append(shift_id)
+            continue
+        if end_minutes <= start_minutes:
+            end_minutes += MINUTES_PER_DAY
+        updates.append({
+            "b_id": shift_id,
+            "b_date": normalized_date,
+            "b_start": start_minutes,
+            "b_end": end_minutes,
+        })
+
+    update = shifts.update().where(shifts.c.id == sa.bindparam("b_id")).values(
+        date=sa.bindparam("b_date"),
+        start_minutes=sa.bindparam("b_start"),
+        end_minutes=sa.bindparam("b_end"),
+    )
+    for offset in range(0, len(updates), BATCH_SIZE):
+        bind.execute(update, updates[offset:offset + BATCH_SIZE])
+    for offset in range(0, len(invalid_ids), BATCH_SIZE):
+        bind.execute(shifts.delete().where(shifts.c.id.in_(invalid_ids[offset:offset + BATCH_SIZE])))
+
+    op.drop_index("idx_shifts_date", table_name="shifts")
+    op.drop_index("idx_shifts_store_date", table_name="shifts")
+
+    with op.batch_alter_table("shifts") as batch_op:
+        # SQLiteのDate型は "YYYY-MM-DD" 文字列で保存されるため型変更は不要
+        # （バッチモードの型変更はCASTで値が壊れる）
+        if bind.dialect.name != "sqlite":
+            batch_op.alter_column(
+                "date", type_=sa.Date(), existing_nullable=False,
+                postgresql_using="date::date",
+            )
+        batch_op.alter_column("start_minutes", existing_type=sa.SmallInteger(), nullable=False)
+        batch_op.alter_column("end_minutes", existing_type=sa.SmallInteger(), nullable=False)
+        batch_op.drop_column("start_time")
+        batch_op.drop_column("end_time")
+
+    op.create_index("idx_shifts_date_start", "shifts", ["date", "start_minutes"])
+    op.create_index("idx_shifts_store_date_start", "shifts", ["store_id", "date", "start_minutes"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+
+    op.drop_index("idx_shifts_store_date_start", table_name="shifts")
+    op.drop_index("idx_shifts_date_start", table_name="shifts")
+
+    with op.batch_alter_table("shifts") as batch_op:
+        batch_op.add_column(sa.Column("start_time", sa.String(5)))
+        batch_op.add_column(sa.Column("end_time", sa.String(5)))
+        if bind.dialect.name != "sqlite":
+            batch_op.alter_column(
+                "date", type_=sa.String(10), existing_nullable=False,
+                postgresql_using="to_char(date, 'YYYY-MM-DD')",
+            )
+
+    rows = bind.execute(
+        sa.select(shifts.c.id, shifts.c.start_minutes, shifts.c.end_minutes)
+    ).all()
+    updates = [
+        {"b_id": shift_id, "b_start": _to_time(start), "b_end": _to_time(end)}
+        for shift_id, start, end in rows
+    ]
+    update = shifts.update().where(shifts.c.id == sa.bindparam("b_id")).values(
+        start_time=sa.bindparam("b_start"),
+        end_time=sa.bindparam("b_end"),
+    )
+    for offset in range(0, len(updates), BATCH_SIZE):
+        bind.execute(update, updates[offset:offset + BATCH_SIZE])
+
+    with op.batch_alter_table("shifts") as batch_op:
+        batch_op.alter_column("start_time", existing_type=sa.String(5), nullable=False)
+        batch_op.alter_column("end_time", existing_type=sa.String(5), nullable=False)
+        batch_op.drop_column("start_minutes")
+        batch_op.drop_column("end_minutes")
+
+    op.create_index("idx_shifts_date", "shifts", ["date"])
+    op.create_index("idx_shifts_store_date", "shifts", ["store_id", "date"])
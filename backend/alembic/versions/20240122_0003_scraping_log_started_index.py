@@ -0,0 +1,25 @@
+"""
+スクレイピングログの開始日時インデックスを追加
+
+日次クリーンアップの分割削除（started_at < 基準日時）で全件走査しないようにする
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-01-22 00:00:00
+"""
+
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("idx_scraping_logs_started_at", "scraping_logs", ["started_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_scraping_logs_started_at", table_name="scraping_logs")
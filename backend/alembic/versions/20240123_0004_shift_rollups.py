@@ -0,0 +1,155 @@
+"""
+シフト集計（ロールアップ）テーブルを追加
+
+- girl_daily_stats / girl_monthly_stats: 嬢別の日次・月次集計
+- store_daily_stats / store_monthly_stats: 店舗別の日次・月次集計
+
+シフト数・勤務時間（分）・開始時刻のヒストグラム（日次は時別、月次は曜日×時）を保持し、
+生シフトが保持期間で削除されても統計が残るようにする。既存のシフトから初期値を作成する
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-01-23 00:00:00
+"""
+
+import json
+from collections import defaultdict
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+shifts = sa.table(
+    "shifts",
+    sa.column("store_id", sa.String),
+    sa.column("girl_id", sa.Integer),
+    sa.column("date", sa.Date),
+    sa.column("start_minutes", sa.SmallInteger),
+    sa.column("end_minutes", sa.SmallInteger),
+)
+
+
+def _insert(table: sa.Table, rows: list) -> None:
+    for offset in range(0, len(rows), BATCH_SIZE):
+        op.bulk_insert(table, rows[offset:offset + BATCH_SIZE])
+
+
+def upgrade() -> None:
+    girl_daily_stats = op.create_table(
+        "girl_daily_stats",
+        sa.Column("girl_id", sa.Integer(), sa.ForeignKey("girls.id"), primary_key=True),
+        sa.Column("date", sa.Date(), primary_key=True),
+        sa.Column("store_id", sa.String(), sa.ForeignKey("stores.id"), nullable=False),
+        sa.Column("shift_count", sa.Integer(), nullable=False),
+        sa.Column("total_minutes", sa.Integer(), nullable=False),
+        sa.Column("hour_histogram", sa.Text(), nullable=False),
+    )
+    op.create_index("idx_girl_daily_stats_store_date", "girl_daily_stats", ["store_id", "date"])
+
+    girl_monthly_stats = op.create_table(
+        "girl_monthly_stats",
+        sa.Column("girl_id", sa.Integer(), sa.ForeignKey("girls.id"), primary_key=True),
+        sa.Column("month", sa.Date(), primary_key=True),
+        sa.Column("store_id", sa.String(), sa.ForeignKey("stores.id"), nullable=False),
+        sa.Column("shift_count", sa.Integer(), nullable=False),
+        sa.Column("work_days", sa.Integer(), nullable=False),
+        sa.Column("total_minutes", sa.Integer(), nullable=False),
+        sa.Column("hour_histogram", sa.Text(), nullable=False),
+    )
+    store_daily_stats = op.create_table(
+        "store_daily_stats",
+        sa.Column("store_id", sa.String(), sa.ForeignKey("stores.id"), primary_key=True),
+        sa.Column("date", sa.Date(), primary_key=True),
+        sa.Column("shift_count", sa.Integer(), nullable=False),
+        sa.Column("girl_count", sa.Integer(), nullable=False),
+        sa.Column("total_minutes", sa.Integer(), nullable=False),
+        sa.Column("hour_histogram", sa.Text(), nullable=False),
+    )
+    store_monthly_stats = op.create_table(
+        "store_monthly_stats",
+        sa.Column("store_id", sa.String(), sa.ForeignKey("stores.id"), primary_key=True),
+        sa.Column("month", sa.Date(), primary_key=True),
+        sa.Column("shift_count", sa.Integer(), nullable=False),
+        sa.Column("girl_days", sa.Integer(), nullable=False),
+        sa.Column("total_minutes", sa.Integer(), nullable=False),
+        sa.Column("hour_histogram", sa.Text(), nullable=False),
+    )
+
+    # 既存のシフトから集計を作成
+    def daily_values():
+        return {"shift_count": 0, "girls": 0, "total_minutes": 0, "hours": [0] * 24}
+
+    def monthly_values():
+        return {"shift_count": 0, "days": 0, "total_minutes": 0,
+                "hours": [[0] * 24 for _ in range(7)]}
+
+    girl_daily = defaultdict(daily_values)
+    for store_id, girl_id, day, start_minutes, end_minutes in op.get_bind().execute(
+        sa.select(shifts.c.store_id, shifts.c.girl_id, shifts.c.date,
+                  shifts.c.start_minutes, shifts.c.end_minutes)
+    ):
+        if isinstance(day, str):
+            day = datetime.strptime(day, "%Y-%m-%d").date()
+        values = girl_daily[(girl_id, day, store_id)]
+        values["shift_count"] += 1
+        values["total_minutes"] += end_minutes - start_minutes
+        values["hours"][start_minutes // 60] += 1
+
+    girl_monthly = defaultdict(monthly_values)
+    store_daily = defaultdict(daily_values)
+    store_monthly = defaultdict(monthly_values)
+    for (girl_id, day, store_id), values in girl_daily.items():
+        month = day.replace(day=1)
+        for target, key in [(girl_monthly, (girl_id, month, store_id)),
+                            (store_daily, (store_id, day)), (store_monthly, (store_id, month))]:
+            target[key]["shift_count"] += values["shift_count"]
+            target[key]["total_minutes"] += values["total_minutes"]
+            for hour, count in enumerate(values["hours"]):
+                if target is store_daily:
+                    target[key]["hours"][hour] += count
+                else:
+                    target[key]["hours"][day.weekday()][hour] += count
+        girl_monthly[(girl_id, month, store_id)]["days"] += 1
+        store_monthly[(store_id, month)]["days"] += 1
+        store_daily[(store_id, day)]["girls"] += 1
+
+    _insert(girl_daily_stats, [
+        {"girl_id": girl_id, "date": day, "store_id": store_id,
+         "shift_count": v["shift_count"], "total_minutes": v["total_minutes"],
+         "hour_histogram": json.dumps(v["hours"])}
+        for (girl_id, day, store_id), v in girl_daily.items()
+    ])
+    _insert(girl_monthly_stats, [
+        {"girl_id": girl_id, "month": month, "store_id": store_id,
+         "shift_count": v["shift_count"], "work_days": v["days"],
+         "total_minutes": v["total_minutes"], "hour_histogram": json.dumps(v["hours"])}
+        for (girl_id, month, store_id), v in girl_monthly.items()
+    ])
+    _insert(store_daily_stats, [
+        {"store_id": store_id, "date": day, "shift_count": v["shift_count"],
+         "girl_count": v["girls"], "total_minutes": v["total_minutes"],
+         "hour_histogram": json.dumps(v["hours"])}
+        for (store_id, day), v in store_daily.items()
+    ])
+    _insert(store_monthly_stats, [
+        {"store_id": store_id, "month": month, "shift_count": v["shift_count"],
+         "girl_days": v["days"], "total_minutes": v["total_minutes"],
+         "hour_histogram": json.dumps(v["hours"])}
+        for (store_id, month), v in store_monthly.items()
+    ])
+
+
+def downgrade() -> None:
+    op.drop_table("store_monthly_stats")
+    op.drop_table("store_daily_stats")
+    op.drop_table("girl_monthly_stats")
+    op.drop_index("idx_girl_daily_stats_store_date", table_name="girl_daily_stats")
+    op.drop_table("girl_daily_stats")
@@ -0,0 +1,63 @@
+"""
+管理画面用の集計カウンターテーブルを追加
+
+嬢数・アクティブ嬢数・累計シフト数・日別の新規嬢数をスクレイピング時に増減させ、
+管理画面の統計をテーブルの件数に関係なく1クエリで返せるようにする。
+既存のデータから初期値を作成する（累計シフト数は集計テーブルから）
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2024-01-24 00:00:00
+"""
+
+from collections import Counter
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+girls = sa.table(
+    "girls",
+    sa.column("status", sa.String),
+    sa.column("first_seen", sa.DateTime),
+)
+store_monthly_stats = sa.table(
+    "store_monthly_stats",
+    sa.column("shift_count", sa.Integer),
+)
+
+
+def upgrade() -> None:
+    stats_counters = op.create_table(
+        "stats_counters",
+        sa.Column("name", sa.String(50), primary_key=True),
+        sa.Column("value", sa.Integer(), nullable=False),
+    )
+
+    bind = op.get_bind()
+    counters = Counter()
+    for status, first_seen in bind.execute(sa.select(girls.c.status, girls.c.first_seen)):
+        counters["girls_total"] += 1
+        if status == "active":
+            counters["girls_active"] += 1
+        if isinstance(first_seen, str):
+            first_seen = datetime.fromisoformat(first_seen)
+        if first_seen is not None:
+            counters[f"girls_new:{first_seen.date().isoformat()}"] += 1
+    counters["shifts_total"] = bind.execute(
+        sa.select(sa.func.coalesce(sa.func.sum(store_monthly_stats.c.shift_count), 0))
+    ).scalar()
+
+    op.bulk_insert(stats_counters, [
+        {"name": name, "value": value} for name, value in counters.items()
+    ])
+
+
+def downgrade() -> None:
+    op.drop_table("stats_counters")
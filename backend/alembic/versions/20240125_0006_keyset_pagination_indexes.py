@@ -0,0 +1,33 @@
+"""
+キーセットページネーション用の複合インデックスを追加
+
+- girls: (last_seen, id) / (store_id, last_seen, id)
+- shifts: (date DESC, start_minutes, id)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2024-01-25 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("idx_girls_last_seen", "girls", ["last_seen", "id"])
+    op.create_index("idx_girls_store_last_seen", "girls", ["store_id", "last_seen", "id"])
+    op.create_index(
+        "idx_shifts_date_desc_start", "shifts", [sa.text("date DESC"), "start_minutes", "id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_shifts_date_desc_start", table_name="shifts")
+    op.drop_index("idx_girls_store_last_seen", table_name="girls")
+    op.drop_index("idx_girls_last_seen", table_name="girls")
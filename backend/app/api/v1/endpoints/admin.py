@@ -4,18 +4,21 @@ Basic認証で保護された管理機能を提供する
 """
 
 import secrets
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-from ....database import get_db, get_redis
+from ....database import get_async_db, get_redis
+from ....cache import (
+    cache_get, get_cleanup_status, invalidate_namespaces, namespace_stats, namespaced_key,
+    CacheCleanup, NAMESPACES, SCRAPING,
+)
 from ....crud import AdminRepository
 from ....schemas import AdminStatsResponse, ScrapingStatus, ManualScrapeRequest
 from ....config import settings
 from ....scraper.scheduler import ScrapingScheduler
 from ....scraper.image_uploader import ImageUploader
-import json
 
 router = APIRouter()
 security = HTTPBasic()
@@ -23,6 +26,9 @@ security = HTTPBasic()
 # スケジューラーインスタンス（グローバル）
 scraping_scheduler = None
 
+# 古いキャッシュキーの削除ジョブ（グローバル）
+cache_cleanup = None
+
 
 def get_current_admin(credentials: HTTPBasicCredentials = Depends(security)):
     """Basic認証でユーザーを検証"""
@@ -40,7 +46,7 @@ def get_current_admin(credentials: HTTPBasicCredentials = Depends(security)):
 
 @router.get("/stats", response_model=AdminStatsResponse)
 async def get_admin_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: str = Depends(get_current_admin)
 ):
     """
@@ -50,31 +56,21 @@ async def get_admin_stats(
         AdminStatsResponse: 統計情報とスクレイピング状況
     """
     # 基本統計を取得
-    stats = AdminRepository.get_stats(db)
-    
-    # スクレイピング状況を取得
-    scraping_logs = AdminRepository.get_scraping_logs(db, limit=20)
-    
-    # 店舗別の最新ステータスを作成
-    scraping_status_dict = {}
-    for log in scraping_logs:
-        if log.store_id not in scraping_status_dict:
-            scraping_status_dict[log.store_id] = ScrapingStatus(
-                store_id=log.store_id,
-                store_name=log.store_id,  # 実際は店舗名を取得
-                status=log.status,
-                last_run=log.started_at,
-                girls_found=log.girls_found,
-                shifts_found=log.shifts_found,
-                error_message=log.error_message
-            )
+    stats = await AdminRepository.get_stats(db)
     
-    # 店舗名を取得して更新
-    from ....crud import StoreRepository
-    for status_obj in scraping_status_dict.values():
-        store = StoreRepository.get_by_id(db, status_obj.store_id)
-        if store:
-            status_obj.store_name = store.name
+    # 店舗ごとの最新のスクレイピング状況を店舗名と合わせて取得
+    scraping_status = [
+        ScrapingStatus(
+            store_id=log.store_id,
+            store_name=store_name,
+            status=log.status,
+            last_run=log.started_at,
+            girls_found=log.girls_found,
+            shifts_found=log.shifts_found,
+            error_message=log.error_message
+        )
+        for log, store_name in await AdminRepository.get_latest_scraping_logs(db)
+    ]
     
     # Cloudflare使用量を取得
     image_uploader = ImageUploader()
@@ -86,7 +82,7 @@ async def get_admin_stats(
         total_shifts=stats["total_shifts"],
         active_girls=stats["active_girls"],
         new_girls_today=stats["new_girls_today"],
-        scraping_status=list(scraping_status_dict.values()),
+        scraping_status=scraping_status,
         cloudflare_usage=cloudflare_usage
     )
     
@@ -96,7 +92,7 @@ async def get_admin_stats(
 @router.post("/scrape")
 async def manual_scrape(
     request: ManualScrapeRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: str = Depends(get_current_admin)
 ):
     """
@@ -153,10 +149,12 @@ async def get_scheduler_status(
     
     # 最後の実行結果をRedisから取得
     redis_client = get_redis()
-    last_execution = redis_client.get("scraping:last_execution")
+    last_execution = await cache_get(
+        redis_client, await namespaced_key(redis_client, SCRAPING, "last_execution")
+    )
     
     if last_execution:
-        status["last_execution"] = json.loads(last_execution)
+        status["last_execution"] = last_execution
     
     return status
 
@@ -223,7 +221,7 @@ async def stop_scheduler(
 @router.get("/logs")
 async def get_scraping_logs(
     limit: int = 50,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: str = Depends(get_current_admin)
 ):
     """
@@ -235,18 +233,15 @@ async def get_scraping_logs(
     Returns:
         List[dict]: ログエントリのリスト
     """
-    logs = AdminRepository.get_scraping_logs(db, limit)
+    logs = await AdminRepository.get_scraping_logs(db, limit)
     
     # 店舗名を含むログ情報を構築
     log_entries = []
-    for log in logs:
-        from ....crud import StoreRepository
-        store = StoreRepository.get_by_id(db, log.store_id)
-        
+    for log, store_name in logs:
         log_entry = {
             "id": log.id,
             "store_id": log.store_id,
-            "store_name": store.name if store else "Unknown Store",
+            "store_name": store_name or "Unknown Store",
             "status": log.status,
             "girls_found": log.girls_found,
             "shifts_found": log.shifts_found,
@@ -260,42 +255,93 @@ async def get_scraping_logs(
     return log_entries
 
 
+@router.get("/cache/stats")
+async def get_cache_stats(
+    _: str = Depends(get_current_admin)
+):
+    """
+    キャッシュの名前空間別使用量を取得する
+    
+    Returns:
+        dict: 名前空間ごとのキー数・バイト数と合計
+    """
+    try:
+        stats = await namespace_stats(get_redis())
+        stats["codec"] = settings.cache_codec
+        stats["compression"] = settings.cache_compression
+        return stats
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to get cache stats: {str(e)}"
+        )
+
+
 @router.delete("/cache")
 async def clear_cache(
+    namespaces: Optional[List[str]] = Query(None, description="対象の名前空間（省略時は全て）"),
     _: str = Depends(get_current_admin)
 ):
     """
-    全てのキャッシュをクリアする
+    キャッシュをクリアする
+    
+    名前空間のバージョンを進めて即座に無効化し、古いキーは
+    バックグラウンドでSCAN / UNLINKにより少しずつ削除する
     
+    Args:
+        namespaces: 対象の名前空間（省略時は全て）
+        
     Returns:
-        dict: クリア結果
+        dict: 新しいバージョンと削除ジョブの状態
     """
+    global cache_cleanup
+    
+    targets = namespaces or NAMESPACES
+    unknown = [ns for ns in targets if ns not in NAMESPACES]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown cache namespaces: {', '.join(unknown)}"
+        )
+    
     try:
         redis_client = get_redis()
+        versions = await invalidate_namespaces(redis_client, targets)
         
-        # 関連するキーパターンのキャッシュをクリア
-        patterns = [
-            "shifts_by_date:*",
-            "store_shifts:*",
-            "girl_detail:*",
-            "new_girls_today:*",
-            "scraping:*"
-        ]
-        
-        cleared_count = 0
-        for pattern in patterns:
-            keys = redis_client.keys(pattern)
-            if keys:
-                redis_client.delete(*keys)
-                cleared_count += len(keys)
+        if cache_cleanup is None or cache_cleanup.redis is not redis_client:
+            cache_cleanup = CacheCleanup(redis_client)
+        started = cache_cleanup.schedule(targets)
         
         return {
             "status": "success",
-            "message": f"Cleared {cleared_count} cache entries"
+            "message": f"Invalidated {len(versions)} cache namespaces",
+            "versions": versions,
+            "cleanup": "started" if started else "queued"
         }
         
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to clear cache: {str(e)}"
+        )
+
+
+@router.get("/cache/cleanup")
+async def get_cache_cleanup_status(
+    _: str = Depends(get_current_admin)
+):
+    """
+    古いキャッシュキーの削除ジョブの進捗を取得する
+    
+    Returns:
+        dict: ジョブID・状態・走査数・削除数など
+    """
+    try:
+        return await get_cleanup_status(get_redis())
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to get cache cleanup status: {str(e)}"
         )
\ No newline at end of file
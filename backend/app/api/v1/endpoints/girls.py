@@ -3,55 +3,95 @@
 嬢のプロフィールとシフト履歴を提供する
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from collections import Counter
 
-from ....database import get_db, get_redis
-from ....crud import GirlRepository
+from ....database import get_async_db, get_redis
+from ....cache import (
+    load_validator, cache_get, cache_set, namespaced_key, GIRLS, SHIFTS,
+    GIRL_DETAIL, NEW_GIRLS_TODAY,
+)
+from ....crud import GirlRepository, RollupRepository
 from ....schemas import GirlResponse, GirlDetailResponse, ShiftResponse
+from ....pagination import InvalidCursor, after_cursor, decode_cursor, order_by, set_next_cursor
 from .... import models
-import json
 
 router = APIRouter()
 
+# 嬢一覧の並び順（最終確認日時の新しい順、同時刻はID降順）
+GIRL_SORT_KEY = [(models.Girl.last_seen, True), (models.Girl.id, True)]
+
+
+def _girl_sort_values(girl: models.Girl) -> list:
+    return [girl.last_seen, girl.id]
+
+
+def _apply_girl_cursor(query, cursor: Optional[str]):
+    """カーソル位置より後ろの嬢に絞り込む（不正なカーソルは400）"""
+    if cursor:
+        try:
+            values = decode_cursor(cursor, len(GIRL_SORT_KEY))
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(after_cursor(GIRL_SORT_KEY, values))
+    return query.order_by(*order_by(GIRL_SORT_KEY))
+
 
 @router.get("/", response_model=List[GirlResponse])
 async def get_girls(
+    request: Request,
+    response: Response,
     store_id: Optional[str] = Query(None, description="店舗IDでフィルター"),
     status: Optional[str] = Query(None, description="ステータスでフィルター (active/new/left)"),
     limit: int = Query(100, description="取得件数", ge=1, le=200),
-    offset: int = Query(0, description="オフセット", ge=0),
-    db: Session = Depends(get_db)
+    offset: int = Query(0, description="オフセット（互換用、cursorを推奨）", ge=0),
+    cursor: Optional[str] = Query(None, description="前ページのX-Next-Cursorヘッダーの値"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     嬢一覧を取得する
     
+    次ページがある場合はX-Next-Cursorヘッダーにカーソルを返す
+    
     Args:
         store_id: 店舗ID (オプション)
         status: ステータス (オプション)
         limit: 最大取得件数
-        offset: オフセット
+        offset: オフセット（cursorと同時には指定できない）
+        cursor: 次ページのカーソル
         
     Returns:
         List[GirlResponse]: 嬢情報のリスト
     """
-    query = db.query(models.Girl)
+    if status and status not in ["active", "new", "left"]:
+        raise HTTPException(status_code=400, detail="Invalid status. Use: active, new, left")
+    
+    if cursor and offset:
+        raise HTTPException(status_code=400, detail="Use either cursor or offset")
+    
+    # 条件付きGETの判定（DBアクセス前）
+    validator, _ = await load_validator(get_redis(), request, [GIRLS])
+    if validator.is_not_modified():
+        return validator.not_modified_response()
+    validator.apply(response)
+    
+    query = select(models.Girl)
     
     # フィルター条件を適用
     if store_id:
-        query = query.filter(models.Girl.store_id == store_id)
+        query = query.where(models.Girl.store_id == store_id)
     
     if status:
-        if status not in ["active", "new", "left"]:
-            raise HTTPException(status_code=400, detail="Invalid status. Use: active, new, left")
-        query = query.filter(models.Girl.status == status)
+        query = query.where(models.Girl.status == status)
     
-    # 結果取得
-    girls = query.order_by(
-        models.Girl.last_seen.desc()
-    ).offset(offset).limit(limit).all()
+    # 結果取得（次ページの有無を判定するため1件多く取得）
+    result = await db.execute(
+        _apply_girl_cursor(query, cursor).offset(offset).limit(limit + 1)
+    )
+    girls = set_next_cursor(response, list(result.scalars().all()), limit, _girl_sort_values)
     
     # レスポンス形式に変換
     girl_responses = []
@@ -73,7 +113,9 @@ async def get_girls(
 @router.get("/{girl_id}", response_model=GirlDetailResponse)
 async def get_girl_detail(
     girl_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     嬢の詳細情報を取得する
@@ -84,21 +126,26 @@ async def get_girl_detail(
     Returns:
         GirlDetailResponse: 嬢の詳細情報（シフト履歴含む）
     """
-    # キャッシュをチェック
+    # 条件付きGETの判定とキャッシュの取得（1往復、DBアクセス前）
     redis_client = get_redis()
-    cache_key = f"girl_detail:{girl_id}"
-    cached_data = redis_client.get(cache_key)
+    cache_key = await namespaced_key(redis_client, GIRL_DETAIL, girl_id)
+    validator, cached_data = await load_validator(
+        redis_client, request, [GIRLS, SHIFTS], cache_key=cache_key
+    )
+    if validator.is_not_modified():
+        return validator.not_modified_response()
     
-    if cached_data:
-        return json.loads(cached_data)
+    if cached_data is not None:
+        validator.apply(response)
+        return cached_data
     
     # 嬢情報を取得
-    girl = GirlRepository.get_by_id(db, girl_id)
+    girl = await GirlRepository.get_by_id(db, girl_id)
     if not girl:
         raise HTTPException(status_code=404, detail="Girl not found")
     
     # 直近のシフト履歴を取得
-    recent_shifts = GirlRepository.get_recent_shifts(db, girl_id, limit=30)
+    recent_shifts = await GirlRepository.get_recent_shifts(db, girl_id, limit=30)
     
     # シフト履歴をレスポンス形式に変換
     shift_responses = []
@@ -117,23 +164,23 @@ async def get_girl_detail(
         )
         shift_responses.append(shift_response)
     
-    # 統計情報を計算
-    work_days_count = len(recent_shifts)
-    
-    # よく入る時間帯を分析
-    time_slots = []
-    for shift in recent_shifts:
-        start_hour = int(shift.start_time.split(':')[0])
-        if start_hour < 12:
-            time_slots.append("morning")
-        elif start_hour < 17:
-            time_slots.append("afternoon")
-        else:
-            time_slots.append("evening")
+    # 統計情報は集計テーブルから取得（保持期間で削除された過去のシフトも含む）
+    summary = await RollupRepository.get_girl_summary(db, girl_id)
+    work_days_count = summary["work_days"]
+    
+    # よく入る時間帯を分析（曜日×開始時刻のヒストグラムを時間帯ごとに合計）
+    time_counter = Counter()
+    for hours in summary["hour_histogram"]:
+        for start_hour, count in enumerate(hours):
+            if start_hour < 12:
+                time_counter["morning"] += count
+            elif start_hour < 17:
+                time_counter["afternoon"] += count
+            else:
+                time_counter["evening"] += count
     
     # 頻度の高い時間帯を取得
-    time_counter = Counter(time_slots)
-    favorite_time_slots = [slot for slot, _ in time_counter.most_common(3)]
+    favorite_time_slots = [slot for slot, count in time_counter.most_common(3) if count]
     
     # 時間帯名を日本語に変換
     time_slot_names = {
@@ -143,7 +190,7 @@ async def get_girl_detail(
     }
     favorite_time_slots = [time_slot_names.get(slot, slot) for slot in favorite_time_slots]
     
-    response = GirlDetailResponse(
+    detail_response = GirlDetailResponse(
         id=girl.id,
         name=girl.name,
         store_id=girl.store_id,
@@ -157,49 +204,54 @@ async def get_girl_detail(
     )
     
     # 結果をキャッシュ (30分間)
-    redis_client.setex(cache_key, 1800, json.dumps(response.dict()))
+    await cache_set(redis_client, cache_key, 1800, detail_response.dict())
     
-    return response
+    validator.apply(response)
+    return detail_response
 
 
 @router.get("/search/")
 async def search_girls(
+    response: Response,
     name: Optional[str] = Query(None, description="嬢名で検索（部分一致）"),
     store_id: Optional[str] = Query(None, description="店舗IDで検索"),
     status: Optional[str] = Query(None, description="ステータスで検索"),
     limit: int = Query(50, description="取得件数", ge=1, le=100),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="前ページのX-Next-Cursorヘッダーの値"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     嬢情報を条件検索する
     
+    次ページがある場合はX-Next-Cursorヘッダーにカーソルを返す
+    
     Args:
         name: 嬢名（部分一致）
         store_id: 店舗ID
         status: ステータス
         limit: 最大取得件数
+        cursor: 次ページのカーソル
         
     Returns:
         List[GirlResponse]: 検索結果
     """
-    query = db.query(models.Girl)
+    query = select(models.Girl)
     
     # 検索条件を適用
     if name:
-        query = query.filter(models.Girl.name.ilike(f"%{name}%"))
+        query = query.where(models.Girl.name.ilike(f"%{name}%"))
     
     if store_id:
-        query = query.filter(models.Girl.store_id == store_id)
+        query = query.where(models.Girl.store_id == store_id)
     
     if status:
         if status not in ["active", "new", "left"]:
             raise HTTPException(status_code=400, detail="Invalid status")
-        query = query.filter(models.Girl.status == status)
+        query = query.where(models.Girl.status == status)
     
-    # 結果取得
-    girls = query.order_by(
-        models.Girl.last_seen.desc()
-    ).limit(limit).all()
+    # 結果取得（次ページの有無を判定するため1件多く取得）
+    result = await db.execute(_apply_girl_cursor(query, cursor).limit(limit + 1))
+    girls = set_next_cursor(response, list(result.scalars().all()), limit, _girl_sort_values)
     
     # レスポンス形式に変換
     results = []
@@ -220,7 +272,7 @@ async def search_girls(
 
 @router.get("/new-today/", response_model=List[GirlResponse])
 async def get_new_girls_today(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     本日新規発見された嬢一覧を取得する
@@ -234,21 +286,24 @@ async def get_new_girls_today(
     
     # キャッシュをチェック
     redis_client = get_redis()
-    cache_key = f"new_girls_today:{today}"
-    cached_data = redis_client.get(cache_key)
+    cache_key = await namespaced_key(redis_client, NEW_GIRLS_TODAY, today)
+    cached_data = await cache_get(redis_client, cache_key)
     
-    if cached_data:
-        return json.loads(cached_data)
+    if cached_data is not None:
+        return cached_data
     
     # 本日NEW状態になった嬢を取得
     from sqlalchemy import func, and_
     
-    new_girls = db.query(models.Girl).filter(
-        and_(
-            models.Girl.status == "new",
-            func.date(models.Girl.first_seen) == today
-        )
-    ).order_by(models.Girl.first_seen.desc()).all()
+    result = await db.execute(
+        select(models.Girl).where(
+            and_(
+                models.Girl.status == "new",
+                func.date(models.Girl.first_seen) == today
+            )
+        ).order_by(models.Girl.first_seen.desc())
+    )
+    new_girls = result.scalars().all()
     
     # レスポンス形式に変換
     results = []
@@ -265,6 +320,6 @@ async def get_new_girls_today(
         results.append(girl_response)
     
     # 結果をキャッシュ (1時間)
-    redis_client.setex(cache_key, 3600, json.dumps([r.dict() for r in results]))
+    await cache_set(redis_client, cache_key, 3600, [r.dict() for r in results])
     
     return results
\ No newline at end of file
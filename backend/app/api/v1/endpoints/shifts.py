@@ -3,25 +3,40 @@
 シフト情報の取得と検索を提供する
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
 from typing import List, Optional
 from datetime import datetime, timedelta
 
-from ....database import get_db, get_redis
+from ....database import get_async_db, get_redis
+from ....cache import (
+    load_validator, cache_set, namespaced_key, GIRLS, SHIFTS, STORES,
+    SHIFTS_BY_DATE, STORE_SHIFTS,
+)
 from ....crud import ShiftRepository, StoreRepository
 from ....schemas import ShiftResponse, DayShiftsResponse, StoreShiftsResponse
+from ....pagination import InvalidCursor, after_cursor, decode_cursor, order_by, set_next_cursor
 from .... import models
-import json
 
 router = APIRouter()
 
+# シフト検索の並び順（新しい日付順、同日は開始時刻・ID順）
+SHIFT_SORT_KEY = [
+    (models.Shift.date, True),
+    (models.Shift.start_minutes, False),
+    (models.Shift.id, False),
+]
+
 
 @router.get("/", response_model=DayShiftsResponse)
 async def get_shifts_by_date(
+    request: Request,
+    response: Response,
     date: str = Query(..., description="取得日付 (YYYY-MM-DD形式)"),
     store_id: Optional[str] = Query(None, description="特定店舗のみ取得"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     指定日のシフト情報を取得する
@@ -35,30 +50,26 @@ async def get_shifts_by_date(
     """
     # 日付フォーマットの検証
     try:
-        datetime.strptime(date, "%Y-%m-%d")
+        shift_date = datetime.strptime(date, "%Y-%m-%d").date()
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
     
-    # キャッシュをチェック
+    # 条件付きGETの判定とキャッシュの取得（1往復、DBアクセス前）
     redis_client = get_redis()
-    cache_key = f"shifts_by_date:{date}:{store_id or 'all'}"
-    cached_data = redis_client.get(cache_key)
-    
-    if cached_data:
-        return json.loads(cached_data)
-    
-    # データベースからシフトを取得
-    query = db.query(models.Shift).join(models.Girl).filter(
-        models.Shift.date == date
+    cache_key = await namespaced_key(redis_client, SHIFTS_BY_DATE, date, store_id or 'all')
+    validator, cached_data = await load_validator(
+        redis_client, request, [SHIFTS, GIRLS, STORES], cache_key=cache_key
     )
+    if validator.is_not_modified():
+        return validator.not_modified_response()
+    validator.apply(response)
     
-    if store_id:
-        query = query.filter(models.Shift.store_id == store_id)
+    if cached_data is not None:
+        return cached_data
     
-    shifts = query.order_by(
-        models.Shift.store_id,
-        models.Shift.start_time
-    ).all()
+    # データベースからシフトを嬢情報と合わせて取得し、店舗名は1クエリでまとめて引く
+    shifts = await ShiftRepository.get_by_date(db, shift_date, store_id)
+    store_names = await StoreRepository.get_names(db, [shift.store_id for shift in shifts])
     
     # 店舗別にグループ化
     stores_data = {}
@@ -66,10 +77,9 @@ async def get_shifts_by_date(
     
     for shift in shifts:
         if shift.store_id not in stores_data:
-            store = StoreRepository.get_by_id(db, shift.store_id)
             stores_data[shift.store_id] = {
                 "store_id": shift.store_id,
-                "store_name": store.name if store else "Unknown Store",
+                "store_name": store_names.get(shift.store_id, "Unknown Store"),
                 "shifts": []
             }
         
@@ -89,24 +99,26 @@ async def get_shifts_by_date(
         stores_data[shift.store_id]["shifts"].append(shift_response.dict())
         total_girls += 1
     
-    response = DayShiftsResponse(
+    day_response = DayShiftsResponse(
         date=date,
         total_girls=total_girls,
         stores=list(stores_data.values())
     )
     
     # 結果をキャッシュ (5分間)
-    redis_client.setex(cache_key, 300, json.dumps(response.dict()))
+    await cache_set(redis_client, cache_key, 300, day_response.dict())
     
-    return response
+    return day_response
 
 
 @router.get("/{store_id}", response_model=StoreShiftsResponse)
 async def get_store_shifts(
     store_id: str,
+    request: Request,
+    response: Response,
     days: int = Query(7, description="取得日数 (1-14)", ge=1, le=14),
     start_date: Optional[str] = Query(None, description="開始日 (YYYY-MM-DD, 未指定時は今日)"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     特定店舗のシフト情報を期間指定で取得する
@@ -119,11 +131,6 @@ async def get_store_shifts(
     Returns:
         StoreShiftsResponse: 店舗別シフト情報
     """
-    # 店舗の存在確認
-    store = StoreRepository.get_by_id(db, store_id)
-    if not store:
-        raise HTTPException(status_code=404, detail="Store not found")
-    
     # 開始日の設定
     if start_date:
         try:
@@ -137,17 +144,29 @@ async def get_store_shifts(
     start_date_str = start_dt.strftime("%Y-%m-%d")
     end_date_str = end_dt.strftime("%Y-%m-%d")
     
-    # キャッシュをチェック
+    # 条件付きGETの判定とキャッシュの取得（既定の開始日もETagに含める）
     redis_client = get_redis()
-    cache_key = f"store_shifts:{store_id}:{start_date_str}:{end_date_str}"
-    cached_data = redis_client.get(cache_key)
+    cache_key = await namespaced_key(
+        redis_client, STORE_SHIFTS, store_id, start_date_str, end_date_str
+    )
+    validator, cached_data = await load_validator(
+        redis_client, request, [SHIFTS, GIRLS, STORES], start_date_str, cache_key=cache_key
+    )
+    if validator.is_not_modified():
+        return validator.not_modified_response()
     
-    if cached_data:
-        return json.loads(cached_data)
+    if cached_data is not None:
+        validator.apply(response)
+        return cached_data
+    
+    # 店舗の存在確認
+    store = await StoreRepository.get_by_id(db, store_id)
+    if not store:
+        raise HTTPException(status_code=404, detail="Store not found")
     
     # シフトデータを取得
-    shifts = ShiftRepository.get_by_store_and_date_range(
-        db, store_id, start_date_str, end_date_str
+    shifts = await ShiftRepository.get_by_store_and_date_range(
+        db, store_id, start_dt.date(), end_dt.date()
     )
     
     # レスポンス形式に変換
@@ -181,7 +200,7 @@ async def get_store_shifts(
         last_updated=store.updated_at
     )
     
-    response = StoreShiftsResponse(
+    store_shifts_response = StoreShiftsResponse(
         store=store_response,
         shifts=shift_responses,
         date_range={
@@ -192,61 +211,79 @@ async def get_store_shifts(
     )
     
     # 結果をキャッシュ (10分間)
-    redis_client.setex(cache_key, 600, json.dumps(response.dict()))
+    await cache_set(redis_client, cache_key, 600, store_shifts_response.dict())
     
-    return response
+    validator.apply(response)
+    return store_shifts_response
 
 
 @router.get("/search/")
 async def search_shifts(
+    response: Response,
     girl_name: Optional[str] = Query(None, description="嬢名で検索"),
     store_name: Optional[str] = Query(None, description="店舗名で検索"), 
     date_from: Optional[str] = Query(None, description="検索開始日 (YYYY-MM-DD)"),
     date_to: Optional[str] = Query(None, description="検索終了日 (YYYY-MM-DD)"),
     limit: int = Query(50, description="取得件数", ge=1, le=100),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="前ページのX-Next-Cursorヘッダーの値"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     シフト情報を条件検索する
     
+    次ページがある場合はX-Next-Cursorヘッダーにカーソルを返す
+    
     Args:
         girl_name: 嬢名（部分一致）
         store_name: 店舗名（部分一致）
         date_from: 検索開始日
         date_to: 検索終了日
         limit: 最大取得件数
+        cursor: 次ページのカーソル
         
     Returns:
         List[ShiftResponse]: 検索結果
     """
-    query = db.query(models.Shift).join(models.Girl).join(models.Store)
+    query = select(models.Shift).join(models.Shift.girl).join(models.Shift.store).options(
+        contains_eager(models.Shift.girl)
+    )
     
     # 検索条件を適用
     if girl_name:
-        query = query.filter(models.Girl.name.ilike(f"%{girl_name}%"))
+        query = query.where(models.Girl.name.ilike(f"%{girl_name}%"))
     
     if store_name:
-        query = query.filter(models.Store.name.ilike(f"%{store_name}%"))
+        query = query.where(models.Store.name.ilike(f"%{store_name}%"))
     
     if date_from:
         try:
-            datetime.strptime(date_from, "%Y-%m-%d")
-            query = query.filter(models.Shift.date >= date_from)
+            query = query.where(
+                models.Shift.date >= datetime.strptime(date_from, "%Y-%m-%d").date()
+            )
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid date_from format")
     
     if date_to:
         try:
-            datetime.strptime(date_to, "%Y-%m-%d")
-            query = query.filter(models.Shift.date <= date_to)
+            query = query.where(
+                models.Shift.date <= datetime.strptime(date_to, "%Y-%m-%d").date()
+            )
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid date_to format")
     
-    # 結果取得
-    shifts = query.order_by(
-        models.Shift.date.desc(),
-        models.Shift.start_time
-    ).limit(limit).all()
+    if cursor:
+        try:
+            values = decode_cursor(cursor, len(SHIFT_SORT_KEY))
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(after_cursor(SHIFT_SORT_KEY, values))
+    
+    # 結果取得（次ページの有無を判定するため1件多く取得）
+    result = await db.execute(query.order_by(*order_by(SHIFT_SORT_KEY)).limit(limit + 1))
+    shifts = set_next_cursor(
+        response, list(result.scalars().all()), limit,
+        lambda shift: [shift.date, shift.start_minutes, shift.id]
+    )
     
     # レスポンス形式に変換
     results = []
@@ -3,11 +3,13 @@
 店舗一覧の取得とメタ情報を提供する
 """
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from ....database import get_db
+from ....database import get_async_db, get_redis
+from ....cache import load_validator, GIRLS, STORES
 from ....crud import StoreRepository
 from ....schemas import StoreResponse
 from .... import models
@@ -16,22 +18,34 @@ router = APIRouter()
 
 
 @router.get("/", response_model=List[StoreResponse])
-async def get_stores(db: Session = Depends(get_db)):
+async def get_stores(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     店舗一覧を取得する
     
     Returns:
         List[StoreResponse]: 店舗情報のリスト
     """
-    stores = StoreRepository.get_all(db)
+    # 条件付きGETの判定（DBアクセス前）
+    validator, _ = await load_validator(get_redis(), request, [STORES, GIRLS])
+    if validator.is_not_modified():
+        return validator.not_modified_response()
+    validator.apply(response)
+    
+    stores = await StoreRepository.get_all(db)
     
     # 各店舗の在籍嬢数を取得
     store_responses = []
     for store in stores:
-        girls_count = db.query(models.Girl).filter(
-            models.Girl.store_id == store.id,
-            models.Girl.status.in_(["active", "new"])
-        ).count()
+        girls_count = await db.scalar(
+            select(func.count(models.Girl.id)).where(
+                models.Girl.store_id == store.id,
+                models.Girl.status.in_(["active", "new"])
+            )
+        )
         
         store_response = StoreResponse(
             id=store.id,
@@ -50,7 +64,7 @@ async def get_stores(db: Session = Depends(get_db)):
 
 
 @router.get("/{store_id}", response_model=StoreResponse)
-async def get_store(store_id: str, db: Session = Depends(get_db)):
+async def get_store(store_id: str, db: AsyncSession = Depends(get_async_db)):
     """
     特定店舗の詳細情報を取得する
     
@@ -60,15 +74,17 @@ async def get_store(store_id: str, db: Session = Depends(get_db)):
     Returns:
         StoreResponse: 店舗詳細情報
     """
-    store = StoreRepository.get_by_id(db, store_id)
+    store = await StoreRepository.get_by_id(db, store_id)
     if not store:
         raise HTTPException(status_code=404, detail="Store not found")
     
     # 在籍嬢数を取得
-    girls_count = db.query(models.Girl).filter(
-        models.Girl.store_id == store.id,
-        models.Girl.status.in_(["active", "new"])
-    ).count()
+    girls_count = await db.scalar(
+        select(func.count(models.Girl.id)).where(
+            models.Girl.store_id == store.id,
+            models.Girl.status.in_(["active", "new"])
+        )
+    )
     
     return StoreResponse(
         id=store.id,
@@ -0,0 +1,61 @@
+"""
+キャッシュ層
+バックエンド（Redis / 組み込み）、値のエンコード、名前空間のバージョン管理、
+メモリ計測、HTTP条件付きGETを提供する
+"""
+
+from .accounting import namespace_stats
+from .backends import EmbeddedCache, create_cache_backend
+from .codec import CacheDecodeError, cache_get, cache_set, decode, encode, train_dictionary
+from .namespaces import (
+    GIRL_DETAIL,
+    NAMESPACES,
+    NEW_GIRLS_TODAY,
+    SCRAPING,
+    SHIFTS_BY_DATE,
+    STORE_SHIFTS,
+    CacheCleanup,
+    get_cleanup_status,
+    invalidate_namespaces,
+    namespaced_key,
+)
+from .http import (
+    GIRLS,
+    SHIFTS,
+    STORES,
+    CacheValidator,
+    bump_generation,
+    get_generations,
+    load_validator,
+    queue_generation_bump,
+)
+
+__all__ = [
+    "GIRL_DETAIL",
+    "GIRLS",
+    "NAMESPACES",
+    "NEW_GIRLS_TODAY",
+    "SCRAPING",
+    "SHIFTS_BY_DATE",
+    "STORE_SHIFTS",
+    "SHIFTS",
+    "STORES",
+    "CacheCleanup",
+    "CacheDecodeError",
+    "CacheValidator",
+    "EmbeddedCache",
+    "bump_generation",
+    "cache_get",
+    "cache_set",
+    "create_cache_backend",
+    "decode",
+    "encode",
+    "get_cleanup_status",
+    "get_generations",
+    "invalidate_namespaces",
+    "load_validator",
+    "namespace_stats",
+    "namespaced_key",
+    "queue_generation_bump",
+    "train_dictionary",
+]
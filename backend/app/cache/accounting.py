@@ -0,0 +1,69 @@
+"""
+キャッシュのメモリ計測
+名前空間（キーの先頭セグメント）ごとのキー数と使用バイト数を集計する
+"""
+
+from typing import Any, Dict, List
+
+from redis import asyncio as redis
+
+from .codec import ENVELOPE_MAGIC, HEADER_SIZE
+
+SCAN_BATCH_SIZE = 500
+
+
+def _namespace_of(key: str) -> str:
+    """キーから名前空間を取り出す（例: "store_shifts:abc" -> "store_shifts"）"""
+    return key.split(":", 1)[0]
+
+
+async def namespace_stats(redis_client: redis.Redis) -> Dict[str, Any]:
+    """
+    名前空間ごとのキー数・メモリ使用量・エンコード形式を集計する
+
+    KEYSではなくSCANで走査し、MEMORY USAGEとエンベロープの判定は
+    パイプラインでまとめて問い合わせる
+
+    Args:
+        redis_client: Redisクライアント
+
+    Returns:
+        Dict[str, Any]: 名前空間別の統計と合計
+    """
+    namespaces: Dict[str, Dict[str, int]] = {}
+    batch: List[bytes] = []
+
+    async def flush() -> None:
+        pipe = redis_client.pipeline(transaction=False)
+        for key in batch:
+            pipe.memory_usage(key)
+            pipe.type(key)
+            pipe.getrange(key, 0, HEADER_SIZE - 1)
+        results = await pipe.execute(raise_on_error=False)
+
+        for i, key in enumerate(batch):
+            memory, key_type, header = results[i * 3:i * 3 + 3]
+            name = key.decode("utf-8", "replace") if isinstance(key, bytes) else key
+            entry = namespaces.setdefault(
+                _namespace_of(name), {"keys": 0, "bytes": 0, "legacy_json": 0}
+            )
+            entry["keys"] += 1
+            entry["bytes"] += memory if isinstance(memory, int) else 0
+
+            key_type = key_type.decode() if isinstance(key_type, bytes) else key_type
+            if key_type == "string" and isinstance(header, bytes) and not header.startswith(ENVELOPE_MAGIC):
+                entry["legacy_json"] += 1
+        batch.clear()
+
+    async for key in redis_client.scan_iter(count=SCAN_BATCH_SIZE):
+        batch.append(key)
+        if len(batch) >= SCAN_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+
+    return {
+        "namespaces": dict(sorted(namespaces.items())),
+        "total_keys": sum(ns["keys"] for ns in namespaces.values()),
+        "total_bytes": sum(ns["bytes"] for ns in namespaces.values()),
+    }
@@ -0,0 +1,424 @@
+"""
+キャッシュバックエンド
+Redisと組み込み実装（プロセス内メモリ / SQLiteファイル共有）を設定で切り替える
+
+アプリケーションはredis.asyncioのコマンドのうち以下のサブセットのみを使用し、
+組み込み実装は同じインターフェースを提供する:
+    get / mget / set / setex / delete / unlink / exists / incr / incrby /
+    expire / ttl / hget / hset / hsetnx / hmget / hincrby / hgetall /
+    keys / scan_iter / type / getrange / memory_usage / pipeline / ping / aclose
+"""
+
+import fnmatch
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from redis import asyncio as redis
+from redis.exceptions import ResponseError
+
+from ..config import settings
+
+STRING = "string"
+HASH = "hash"
+
+WRONGTYPE = "WRONGTYPE Operation against a key holding the wrong kind of value"
+
+# 期限切れエントリを掃除する書き込み間隔
+PURGE_INTERVAL = 1000
+
+
+def _to_bytes(value: Any) -> bytes:
+    """Redisと同じ規則で値をバイト列に変換"""
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    if isinstance(value, float):
+        return repr(value).encode("ascii")
+    if isinstance(value, int):
+        return str(value).encode("ascii")
+    raise TypeError(f"Invalid input of type {type(value).__name__}")
+
+
+class _MemoryStore:
+    """プロセス内の辞書ストア"""
+
+    def __init__(self):
+        self._data: Dict[bytes, Tuple[str, Any, Optional[float]]] = {}
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        with self._lock:
+            yield
+
+    def load(self, key: bytes) -> Optional[Tuple[str, Any, Optional[float]]]:
+        entry = self._data.get(key)
+        if entry and entry[2] is not None and entry[2] <= time.time():
+            del self._data[key]
+            return None
+        return entry
+
+    def save(self, key: bytes, kind: str, value: Any, expires_at: Optional[float]) -> None:
+        self._data[key] = (kind, value, expires_at)
+
+    def remove(self, key: bytes) -> bool:
+        return self.load(key) is not None and self._data.pop(key, None) is not None
+
+    def iter_keys(self) -> List[bytes]:
+        return [key for key in list(self._data) if self.load(key) is not None]
+
+    def purge_expired(self) -> None:
+        self.iter_keys()
+
+    def close(self) -> None:
+        self._data.clear()
+
+
+class _SQLiteStore:
+    """SQLiteファイルストア（同一ホストの複数ワーカーで共有可能）"""
+
+    def __init__(self, path: str):
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "key BLOB PRIMARY KEY, kind TEXT NOT NULL, value BLOB NOT NULL, expires_at REAL)"
+        )
+        self._depth = 0
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        # 読み取り・更新を他プロセスに割り込まれないよう書き込みロックを先に取る
+        with self._lock:
+            outermost = self._depth == 0
+            if outermost:
+                self._conn.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield
+            except BaseException:
+                self._depth -= 1
+                if outermost:
+                    self._conn.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if outermost:
+                self._conn.execute("COMMIT")
+
+    def load(self, key: bytes) -> Optional[Tuple[str, Any, Optional[float]]]:
+        row = self._conn.execute(
+            "SELECT kind, value, expires_at FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        kind, value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            return None
+        if kind == HASH:
+            value = {
+                k.encode("latin-1"): v.encode("latin-1") for k, v in json.loads(value).items()
+            }
+        return kind, value, expires_at
+
+    def save(self, key: bytes, kind: str, value: Any, expires_at: Optional[float]) -> None:
+        if kind == HASH:
+            value = json.dumps({k.decode("latin-1"): v.decode("latin-1") for k, v in value.items()})
+        self._conn.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, kind, value, expires_at) VALUES (?, ?, ?, ?)",
+            (key, kind, value, expires_at),
+        )
+
+    def remove(self, key: bytes) -> bool:
+        return self._conn.execute(
+            "DELETE FROM cache_entries WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time()),
+        ).rowcount > 0
+
+    def iter_keys(self) -> List[bytes]:
+        rows = self._conn.execute(
+            "SELECT key FROM cache_entries WHERE expires_at IS NULL OR expires_at > ?",
+            (time.time(),),
+        ).fetchall()
+        return [bytes(row[0]) for row in rows]
+
+    def purge_expired(self) -> None:
+        self._conn.execute(
+            "DELETE FROM cache_entries WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (time.time(),),
+        )
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def _command(name: str):
+    """同期実装 _<name> をトランザクション内で実行する非同期コマンドを生成"""
+    async def method(self, *args, **kwargs):
+        with self._store.transaction():
+            return getattr(self, f"_{name}")(*args, **kwargs)
+    method.__name__ = name
+    return method
+
+
+COMMANDS = (
+    "get", "mget", "set", "setex", "delete", "unlink", "exists", "incr", "incrby",
+    "expire", "ttl", "hget", "hset", "hsetnx", "hmget", "hincrby", "hgetall",
+    "keys", "type", "getrange", "memory_usage", "flushdb",
+)
+
+
+class EmbeddedPipeline:
+    """組み込みキャッシュ用パイプライン（キューしたコマンドを1トランザクションで実行）"""
+
+    def __init__(self, cache: "EmbeddedCache"):
+        self._cache = cache
+        self._commands: List[Tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, name: str):
+        if name not in COMMANDS:
+            raise AttributeError(name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self, raise_on_error: bool = True) -> List[Any]:
+        results = []
+        with self._cache._store.transaction():
+            for name, args, kwargs in self._commands:
+                try:
+                    results.append(getattr(self._cache, f"_{name}")(*args, **kwargs))
+                except ResponseError as e:
+                    if raise_on_error:
+                        raise
+                    results.append(e)
+        self._commands.clear()
+        return results
+
+    async def __aenter__(self) -> "EmbeddedPipeline":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._commands.clear()
+
+
+class EmbeddedCache:
+    """
+    Redis互換の組み込みキャッシュ
+
+    pathを指定しない場合はプロセス内メモリ、指定した場合はSQLiteファイルに保存し、
+    同一ホスト上の複数ワーカーでキャッシュと世代カウンタを共有する
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self._store = _SQLiteStore(path) if path else _MemoryStore()
+        self._writes = 0
+
+    # --- 内部ヘルパー ---
+
+    def _load(self, key: Any, kind: Optional[str] = None) -> Optional[Tuple[str, Any, Optional[float]]]:
+        entry = self._store.load(_to_bytes(key))
+        if entry and kind and entry[0] != kind:
+            raise ResponseError(WRONGTYPE)
+        return entry
+
+    def _save(self, key: Any, kind: str, value: Any, expires_at: Optional[float]) -> None:
+        self._store.save(_to_bytes(key), kind, value, expires_at)
+        self._writes += 1
+        if self._writes % PURGE_INTERVAL == 0:
+            self._store.purge_expired()
+
+    # --- 文字列 ---
+
+    def _get(self, key):
+        entry = self._load(key, STRING)
+        return entry[1] if entry else None
+
+    def _mget(self, keys, *args):
+        keys = list(keys) if isinstance(keys, (list, tuple)) else [keys]
+        return [self._get(key) for key in keys + list(args)]
+
+    def _set(self, key, value, ex=None, px=None, nx=False, xx=False):
+        exists = self._load(key) is not None
+        if (nx and exists) or (xx and not exists):
+            return None
+        expires_at = None
+        if ex is not None:
+            expires_at = time.time() + int(ex)
+        elif px is not None:
+            expires_at = time.time() + int(px) / 1000
+        self._save(key, STRING, _to_bytes(value), expires_at)
+        return True
+
+    def _setex(self, key, time_seconds, value):
+        return self._set(key, value, ex=time_seconds)
+
+    def _incrby(self, key, amount=1):
+        entry = self._load(key, STRING)
+        try:
+            value = int(entry[1]) + amount if entry else amount
+        except ValueError:
+            raise ResponseError("value is not an integer or out of range")
+        self._save(key, STRING, _to_bytes(value), entry[2] if entry else None)
+        return value
+
+    def _incr(self, key, amount=1):
+        return self._incrby(key, amount)
+
+    def _getrange(self, key, start, end):
+        value = self._get(key) or b""
+        end = len(value) if end == -1 else end + 1
+        return value[start:end]
+
+    # --- ハッシュ ---
+
+    def _hash(self, key) -> Tuple[Dict[bytes, bytes], Optional[float]]:
+        entry = self._load(key, HASH)
+        return (dict(entry[1]), entry[2]) if entry else ({}, None)
+
+    def _hget(self, key, field):
+        return self._hash(key)[0].get(_to_bytes(field))
+
+    def _hmget(self, key, keys, *args):
+        fields = list(keys) if isinstance(keys, (list, tuple)) else [keys]
+        values, _ = self._hash(key)
+        return [values.get(_to_bytes(field)) for field in fields + list(args)]
+
+    def _hgetall(self, key):
+        return self._hash(key)[0]
+
+    def _hset(self, key, field=None, value=None, mapping=None):
+        values, expires_at = self._hash(key)
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        added = 0
+        for f, v in items.items():
+            added += _to_bytes(f) not in values
+            values[_to_bytes(f)] = _to_bytes(v)
+        self._save(key, HASH, values, expires_at)
+        return added
+
+    def _hsetnx(self, key, field, value):
+        values, expires_at = self._hash(key)
+        if _to_bytes(field) in values:
+            return False
+        values[_to_bytes(field)] = _to_bytes(value)
+        self._save(key, HASH, values, expires_at)
+        return True
+
+    def _hincrby(self, key, field, amount=1):
+        values, expires_at = self._hash(key)
+        current = int(values.get(_to_bytes(field), b"0"))
+        values[_to_bytes(field)] = _to_bytes(current + amount)
+        self._save(key, HASH, values, expires_at)
+        return current + amount
+
+    # --- キー操作 ---
+
+    def _delete(self, *keys):
+        return sum(self._store.remove(_to_bytes(key)) for key in keys)
+
+    def _unlink(self, *keys):
+        return self._delete(*keys)
+
+    def _exists(self, *keys):
+        return sum(self._load(key) is not None for key in keys)
+
+    def _expire(self, key, seconds):
+        entry = self._load(key)
+        if entry is None:
+            return False
+        self._save(key, entry[0], entry[1], time.time() + int(seconds))
+        return True
+
+    def _ttl(self, key):
+        entry = self._load(key)
+        if entry is None:
+            return -2
+        if entry[2] is None:
+            return -1
+        return max(0, int(round(entry[2] - time.time())))
+
+    def _keys(self, pattern="*"):
+        pattern = pattern.decode() if isinstance(pattern, bytes) else pattern
+        return [
+            key for key in self._store.iter_keys()
+            if fnmatch.fnmatchcase(key.decode("utf-8", "replace"), pattern)
+        ]
+
+    def _type(self, key):
+        entry = self._load(key)
+        return (entry[0] if entry else "none").encode("ascii")
+
+    def _memory_usage(self, key, samples=None):
+        entry = self._load(key)
+        if entry is None:
+            return None
+        kind, value, _ = entry
+        size = len(value) if kind == STRING else sum(len(k) + len(v) for k, v in value.items())
+        return len(_to_bytes(key)) + size
+
+    def _flushdb(self, asynchronous=False):
+        for key in self._store.iter_keys():
+            self._store.remove(key)
+        return True
+
+    # --- 非同期専用 ---
+
+    async def scan_iter(self, match=None, count=None, _type=None, **kwargs):
+        """キー一覧のスナップショットを走査する"""
+        with self._store.transaction():
+            keys = self._keys(match or "*")
+        for key in keys:
+            if _type is not None:
+                with self._store.transaction():
+                    if self._type(key).decode() != _type:
+                        continue
+            yield key
+
+    def pipeline(self, transaction: bool = True) -> EmbeddedPipeline:
+        """パイプラインを作成"""
+        return EmbeddedPipeline(self)
+
+    async def ping(self) -> bool:
+        return True
+
+    async def aclose(self, close_connection_pool: Optional[bool] = None) -> None:
+        """ストアを閉じる"""
+        self._store.close()
+
+
+for _name in COMMANDS:
+    setattr(EmbeddedCache, _name, _command(_name))
+
+
+def create_cache_backend():
+    """
+    設定に従ってキャッシュバックエンドを生成する
+
+    Returns:
+        redis.Redis | EmbeddedCache: cache_backend="redis"の場合はプール付きRedisクライアント、
+        "embedded"の場合は組み込みキャッシュ
+    """
+    if settings.cache_backend == "embedded":
+        return EmbeddedCache(settings.cache_embedded_path)
+
+    pool = redis.ConnectionPool.from_url(
+        settings.redis_url,
+        max_connections=settings.redis_max_connections,
+        socket_timeout=settings.redis_socket_timeout,
+        socket_connect_timeout=settings.redis_socket_timeout,
+        health_check_interval=settings.redis_health_check_interval,
+    )
+    return redis.Redis(connection_pool=pool)
@@ -0,0 +1,267 @@
+"""
+キャッシュ値のエンコード
+MessagePack / zstd 圧縮によるコンパクトな値表現とバージョン付きエンベロープを提供する
+"""
+
+import json
+import logging
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from redis import asyncio as redis
+
+from ..config import settings
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - 任意依存
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - 任意依存
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# エンベロープ: MAGIC(3) + バージョン(1) + コーデック(1) + フラグ(1) + ペイロード
+# JSON文字列はNULで始まらないため、旧形式（json.dumps文字列）と判別できる
+ENVELOPE_MAGIC = b"\x00CC"
+ENVELOPE_VERSION = 1
+HEADER_SIZE = len(ENVELOPE_MAGIC) + 3
+
+CODEC_JSON = 0
+CODEC_MSGPACK = 1
+
+FLAG_ZSTD = 0x01
+FLAG_ZSTD_DICT = 0x02
+
+CODECS = {"json": CODEC_JSON, "msgpack": CODEC_MSGPACK}
+
+
+class CacheDecodeError(ValueError):
+    """キャッシュ値を復元できない場合の例外"""
+
+
+def _default(value: Any) -> Any:
+    """標準でシリアライズできない型を変換"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+class _Zstd:
+    """zstd圧縮器の遅延初期化ホルダー（共有辞書対応）"""
+
+    def __init__(self):
+        self._loaded = False
+        self._dictionary = None
+        self._compressor = None
+        self._dict_compressor = None
+        self._decompressor = None
+        self._dict_decompressor = None
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        self._compressor = zstandard.ZstdCompressor(level=settings.cache_zstd_level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+        if settings.cache_zstd_dict_path:
+            try:
+                data = Path(settings.cache_zstd_dict_path).read_bytes()
+                self._dictionary = zstandard.ZstdCompressionDict(data)
+                self._dict_compressor = zstandard.ZstdCompressor(
+                    level=settings.cache_zstd_level, dict_data=self._dictionary
+                )
+                self._dict_decompressor = zstandard.ZstdDecompressor(dict_data=self._dictionary)
+            except (OSError, zstandard.ZstdError) as e:
+                logger.warning(f"Failed to load zstd dictionary: {e}")
+
+    def compress(self, payload: bytes) -> tuple[bytes, int]:
+        """ペイロードを圧縮し、(圧縮後データ, フラグ) を返す"""
+        self._load()
+        if self._dict_compressor:
+            return self._dict_compressor.compress(payload), FLAG_ZSTD | FLAG_ZSTD_DICT
+        return self._compressor.compress(payload), FLAG_ZSTD
+
+    def decompress(self, payload: bytes, flags: int) -> bytes:
+        """フラグに従ってペイロードを伸長"""
+        self._load()
+        if flags & FLAG_ZSTD_DICT:
+            if not self._dict_decompressor:
+                raise CacheDecodeError("zstd dictionary is not loaded")
+            return self._dict_decompressor.decompress(payload)
+        return self._decompressor.decompress(payload)
+
+    def reset(self) -> None:
+        """設定変更後に圧縮器を作り直す"""
+        self.__init__()
+
+
+_zstd = _Zstd()
+
+
+def _resolve_codec() -> int:
+    """設定と導入済みライブラリから使用コーデックを決定"""
+    codec = CODECS.get(settings.cache_codec, CODEC_JSON)
+    if codec == CODEC_MSGPACK and msgpack is None:
+        return CODEC_JSON
+    return codec
+
+
+def encode(value: Any) -> bytes:
+    """
+    値をエンベロープ付きバイト列にエンコードする
+
+    Args:
+        value: JSON互換の値（datetimeはISO形式に変換）
+
+    Returns:
+        bytes: エンコード済みの値
+    """
+    codec = _resolve_codec()
+    if codec == CODEC_MSGPACK:
+        payload = msgpack.packb(value, default=_default, use_bin_type=True)
+    else:
+        payload = json.dumps(value, ensure_ascii=False, default=_default).encode("utf-8")
+
+    flags = 0
+    if (
+        settings.cache_compression == "zstd"
+        and zstandard is not None
+        and len(payload) >= settings.cache_compress_min_bytes
+    ):
+        payload, flags = _zstd.compress(payload)
+
+    return ENVELOPE_MAGIC + bytes([ENVELOPE_VERSION, codec, flags]) + payload
+
+
+def decode(raw: bytes | str) -> Any:
+    """
+    キャッシュ値をデコードする（旧形式のJSON文字列も読める）
+
+    Args:
+        raw: Redisから取得した値
+
+    Returns:
+        Any: 復元した値
+
+    Raises:
+        CacheDecodeError: 未知のバージョン・コーデック、または破損データ
+    """
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8")
+
+    try:
+        if not raw.startswith(ENVELOPE_MAGIC):
+            return json.loads(raw)
+
+        version, codec, flags = raw[len(ENVELOPE_MAGIC):HEADER_SIZE]
+        if version > ENVELOPE_VERSION:
+            raise CacheDecodeError(f"Unsupported envelope version: {version}")
+
+        payload = raw[HEADER_SIZE:]
+        if flags & FLAG_ZSTD:
+            if zstandard is None:
+                raise CacheDecodeError("zstandard is not installed")
+            payload = _zstd.decompress(payload, flags)
+
+        if codec == CODEC_MSGPACK:
+            if msgpack is None:
+                raise CacheDecodeError("msgpack is not installed")
+            return msgpack.unpackb(payload, raw=False)
+        if codec == CODEC_JSON:
+            return json.loads(payload)
+        raise CacheDecodeError(f"Unknown codec: {codec}")
+
+    except CacheDecodeError:
+        raise
+    except Exception as e:
+        raise CacheDecodeError(str(e)) from e
+
+
+async def cache_get(redis_client: redis.Redis, key: str) -> Optional[Any]:
+    """
+    キャッシュから値を取得する（復元できない値はミス扱い）
+
+    Args:
+        redis_client: Redisクライアント
+        key: キャッシュキー
+
+    Returns:
+        Optional[Any]: 値（未登録・復元失敗時はNone）
+    """
+    raw = await redis_client.get(key)
+    if raw is None:
+        return None
+
+    try:
+        return decode(raw)
+    except CacheDecodeError as e:
+        logger.warning(f"Discarding undecodable cache entry {key}: {e}")
+        return None
+
+
+async def cache_set(redis_client: redis.Redis, key: str, ttl: int, value: Any) -> None:
+    """
+    値をエンコードしてTTL付きでキャッシュに保存する
+
+    Args:
+        redis_client: Redisクライアント
+        key: キャッシュキー
+        ttl: 有効期限（秒）
+        value: 保存する値
+    """
+    await redis_client.setex(key, ttl, encode(value))
+
+
+def train_dictionary(samples: Iterable[Any], dict_size: int = 16384) -> bytes:
+    """
+    キャッシュ値のサンプルからzstd共有辞書を学習する
+
+    店舗名・嬢名・画像URLなど値をまたいで繰り返される文字列を辞書に集約し、
+    小さな値でも圧縮が効くようにする
+
+    Args:
+        samples: 値のサンプル（エンコード前）
+        dict_size: 辞書サイズ（バイト）
+
+    Returns:
+        bytes: cache_zstd_dict_pathに保存する辞書データ
+    """
+    if zstandard is None:
+        raise RuntimeError("zstandard is not installed")
+
+    codec = _resolve_codec()
+    encoded = []
+    for value in samples:
+        if codec == CODEC_MSGPACK:
+            encoded.append(msgpack.packb(value, default=_default, use_bin_type=True))
+        else:
+            encoded.append(json.dumps(value, ensure_ascii=False, default=_default).encode("utf-8"))
+
+    return zstandard.train_dictionary(dict_size, encoded).as_bytes()
+
+
+async def train_dictionary_from_redis(redis_client: redis.Redis, pattern: str = "store_shifts:*",
+                                      dict_size: int = 16384) -> bytes:
+    """
+    Redis上の既存キャッシュ値をサンプルとしてzstd共有辞書を学習する
+
+    Args:
+        redis_client: Redisクライアント
+        pattern: サンプルにするキーのパターン（SCANで走査）
+        dict_size: 辞書サイズ（バイト）
+
+    Returns:
+        bytes: 辞書データ
+    """
+    samples = []
+    async for key in redis_client.scan_iter(match=pattern, count=500):
+        value = await cache_get(redis_client, key)
+        if value is not None:
+            samples.append(value)
+    return train_dictionary(samples, dict_size)
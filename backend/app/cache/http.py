@@ -0,0 +1,216 @@
+"""
+HTTPキャッシュ制御
+データ世代カウンタに基づくETag / Last-Modifiedの算出と条件付きGETの判定を行う
+"""
+
+import hashlib
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import Request, Response
+from redis import asyncio as redis
+
+from ..config import settings
+from .codec import CacheDecodeError, decode
+
+# データ種別ごとの世代名前空間
+STORES = "stores"
+GIRLS = "girls"
+SHIFTS = "shifts"
+
+GENERATION_KEY_PREFIX = "generation:"
+
+
+def _generation_key(namespace: str) -> str:
+    """世代カウンタのRedisキーを返す"""
+    return f"{GENERATION_KEY_PREFIX}{namespace}"
+
+
+def _queue_generation_reads(pipe, namespaces: List[str], now: float) -> None:
+    """世代情報の読み取りコマンドをパイプラインに積む"""
+    for namespace in namespaces:
+        pipe.hsetnx(_generation_key(namespace), "updated_at", now)
+        pipe.hmget(_generation_key(namespace), "value", "updated_at")
+
+
+def _parse_generations(namespaces: List[str], results: List[Any],
+                       now: float) -> Dict[str, Tuple[int, float]]:
+    """パイプラインの結果から世代情報を組み立てる"""
+    generations = {}
+    for namespace, (value, updated_at) in zip(namespaces, results[1::2]):
+        generations[namespace] = (int(value or 0), float(updated_at or now))
+    return generations
+
+
+async def get_generations(redis_client: redis.Redis,
+                          namespaces: Iterable[str]) -> Dict[str, Tuple[int, float]]:
+    """
+    名前空間ごとの世代番号と最終更新時刻を1往復で取得する
+
+    未初期化の名前空間には現在時刻を書き込み、Redisが空になった後でも
+    以前のETagと衝突しないようにする
+
+    Args:
+        redis_client: Redisクライアント
+        namespaces: 名前空間のリスト
+
+    Returns:
+        Dict[str, Tuple[int, float]]: 名前空間 -> (世代番号, 更新時刻)
+    """
+    namespaces = list(namespaces)
+    now = time.time()
+
+    pipe = redis_client.pipeline(transaction=False)
+    _queue_generation_reads(pipe, namespaces, now)
+    results = await pipe.execute()
+
+    return _parse_generations(namespaces, results, now)
+
+
+def queue_generation_bump(pipe, *namespaces: str) -> None:
+    """
+    世代番号を進めるコマンドをパイプラインに積む
+
+    スナップショット保存など他の書き込みと同じ往復で実行したい場合に使う
+
+    Args:
+        pipe: Redisパイプライン
+        namespaces: 更新された名前空間
+    """
+    now = time.time()
+    for namespace in namespaces:
+        pipe.hincrby(_generation_key(namespace), "value", 1)
+        pipe.hset(_generation_key(namespace), "updated_at", now)
+
+
+async def bump_generation(redis_client: redis.Redis, *namespaces: str) -> None:
+    """
+    名前空間の世代番号を進める
+
+    スクレイピング結果のコミット後に呼び出し、既存のETagを無効化する
+
+    Args:
+        redis_client: Redisクライアント
+        namespaces: 更新された名前空間
+    """
+    pipe = redis_client.pipeline()
+    queue_generation_bump(pipe, *namespaces)
+    await pipe.execute()
+
+
+def build_etag(generations: Dict[str, Tuple[int, float]], request: Request,
+               *variants: Optional[str]) -> str:
+    """
+    世代番号とリクエスト内容から強いETagを算出する
+
+    Args:
+        generations: get_generationsの結果
+        request: リクエスト（パスとクエリをETagに含める）
+        variants: 暗黙の条件（既定の日付など）
+
+    Returns:
+        str: 引用符付きETag
+    """
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    seed = "|".join(
+        [request.url.path, query]
+        + [f"{ns}={gen}@{updated_at:.6f}" for ns, (gen, updated_at) in sorted(generations.items())]
+        + [str(v) for v in variants]
+    )
+    digest = hashlib.sha1(seed.encode("utf-8")).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Matchヘッダーが指定ETagに一致するか判定"""
+    if if_none_match.strip() == "*":
+        return True
+    # 弱い比較（W/付きのETagも同一とみなす）
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
+
+class CacheValidator:
+    """条件付きGETの検証子（ETag / Last-Modified / Cache-Control）"""
+
+    def __init__(self, request: Request, generations: Dict[str, Tuple[int, float]],
+                 *variants: Optional[str]):
+        self.request = request
+        self.etag = build_etag(generations, request, *variants)
+        self.last_modified = int(max(updated_at for _, updated_at in generations.values()))
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """検証用レスポンスヘッダー"""
+        return {
+            "ETag": self.etag,
+            "Last-Modified": formatdate(self.last_modified, usegmt=True),
+            "Cache-Control": (
+                f"public, max-age={settings.http_cache_max_age}, "
+                f"stale-while-revalidate={settings.http_cache_stale_while_revalidate}"
+            ),
+        }
+
+    def is_not_modified(self) -> bool:
+        """クライアントのキャッシュが最新かどうか判定（DBにはアクセスしない）"""
+        if_none_match = self.request.headers.get("if-none-match")
+        if if_none_match is not None:
+            # If-None-Matchがある場合はIf-Modified-Sinceを無視する (RFC 9110)
+            return _etag_matches(if_none_match, self.etag)
+
+        if_modified_since = self.request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return self.last_modified <= since
+
+        return False
+
+    def not_modified_response(self) -> Response:
+        """304レスポンスを生成"""
+        return Response(status_code=304, headers=self.headers)
+
+    def apply(self, response: Response) -> None:
+        """通常レスポンスに検証用ヘッダーを付与"""
+        response.headers.update(self.headers)
+
+
+async def load_validator(redis_client: redis.Redis, request: Request,
+                         namespaces: Iterable[str], *variants: Optional[str],
+                         cache_key: Optional[str] = None) -> Tuple[CacheValidator, Optional[Any]]:
+    """
+    検証子とキャッシュ済みレスポンスを1往復で取得する
+
+    Args:
+        redis_client: Redisクライアント
+        request: リクエスト
+        namespaces: レスポンスが依存する名前空間
+        variants: 暗黙の条件（既定の日付など）
+        cache_key: 同時に取得するキャッシュキー（任意）
+
+    Returns:
+        Tuple[CacheValidator, Optional[Any]]: 検証子とキャッシュ値（ミス時はNone）
+    """
+    namespaces = list(namespaces)
+    now = time.time()
+
+    pipe = redis_client.pipeline(transaction=False)
+    _queue_generation_reads(pipe, namespaces, now)
+    if cache_key:
+        pipe.get(cache_key)
+    results = await pipe.execute()
+
+    cached_data = None
+    if cache_key:
+        raw = results.pop()
+        if raw is not None:
+            try:
+                cached_data = decode(raw)
+            except CacheDecodeError:
+                cached_data = None
+
+    validator = CacheValidator(request, _parse_generations(namespaces, results, now), *variants)
+    return validator, cached_data
@@ -0,0 +1,201 @@
+"""
+キャッシュ名前空間のバージョン管理
+名前空間ごとのバージョン番号をキーに含め、番号を進めるだけ（O(1)）で論理的に無効化する
+古いバージョンのキーはSCAN / UNLINKでバックグラウンドに少しずつ削除する
+"""
+
+import asyncio
+import logging
+import re
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+from redis import asyncio as redis
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# キャッシュ名前空間（DELETE /admin/cache の対象）
+SHIFTS_BY_DATE = "shifts_by_date"
+STORE_SHIFTS = "store_shifts"
+GIRL_DETAIL = "girl_detail"
+NEW_GIRLS_TODAY = "new_girls_today"
+SCRAPING = "scraping"
+
+NAMESPACES = [SHIFTS_BY_DATE, STORE_SHIFTS, GIRL_DETAIL, NEW_GIRLS_TODAY, SCRAPING]
+
+VERSIONS_KEY = "cache_versions"
+CLEANUP_STATUS_KEY = "cache_cleanup:status"
+
+_VERSIONED_KEY = re.compile(rb"^[^:]+:v(\d+):")
+
+# ワーカー内のバージョン番号メモ {名前空間: (バージョン, 取得時刻)}
+_version_memo: Dict[str, tuple] = {}
+
+
+async def get_version(redis_client: redis.Redis, namespace: str) -> int:
+    """
+    名前空間の現在のバージョン番号を取得する
+
+    毎リクエストの往復を避けるため、cache_version_check_interval秒間はワーカー内の値を使う
+
+    Args:
+        redis_client: キャッシュクライアント
+        namespace: 名前空間
+
+    Returns:
+        int: バージョン番号（未設定時は0）
+    """
+    memo = _version_memo.get(namespace)
+    now = time.monotonic()
+    if memo and now - memo[1] < settings.cache_version_check_interval:
+        return memo[0]
+
+    version = int(await redis_client.hget(VERSIONS_KEY, namespace) or 0)
+    _version_memo[namespace] = (version, now)
+    return version
+
+
+async def namespaced_key(redis_client: redis.Redis, namespace: str, *parts: Any) -> str:
+    """
+    バージョン付きキャッシュキーを生成する
+
+    Args:
+        redis_client: キャッシュクライアント
+        namespace: 名前空間
+        parts: キーの残りの要素
+
+    Returns:
+        str: "{namespace}:v{version}:{parts}" 形式のキー
+    """
+    version = await get_version(redis_client, namespace)
+    return ":".join([namespace, f"v{version}", *(str(part) for part in parts)])
+
+
+async def invalidate_namespaces(redis_client: redis.Redis,
+                                namespaces: Iterable[str]) -> Dict[str, int]:
+    """
+    名前空間のバージョンを進めて既存キャッシュを論理的に無効化する
+
+    Args:
+        redis_client: キャッシュクライアント
+        namespaces: 無効化する名前空間
+
+    Returns:
+        Dict[str, int]: 名前空間ごとの新しいバージョン
+    """
+    namespaces = list(namespaces)
+    pipe = redis_client.pipeline()
+    for namespace in namespaces:
+        pipe.hincrby(VERSIONS_KEY, namespace, 1)
+    versions = dict(zip(namespaces, await pipe.execute()))
+
+    now = time.monotonic()
+    for namespace, version in versions.items():
+        _version_memo[namespace] = (version, now)
+    return versions
+
+
+def _is_stale(key: bytes, current_version: int) -> bool:
+    """キーが現行バージョンより古い（またはバージョン無しの旧形式）か判定"""
+    match = _VERSIONED_KEY.match(key)
+    return match is None or int(match.group(1)) < current_version
+
+
+class CacheCleanup:
+    """古いバージョンのキャッシュキーを少しずつ削除するバックグラウンドジョブ"""
+
+    def __init__(self, redis_client: redis.Redis):
+        self.redis = redis_client
+        self._task: Optional[asyncio.Task] = None
+        self._pending: set = set()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def schedule(self, namespaces: Iterable[str]) -> bool:
+        """
+        削除ジョブを開始する（実行中なら対象を追加し、終了後に続けて処理する）
+
+        Returns:
+            bool: 新しいジョブを開始した場合True
+        """
+        self._pending.update(namespaces)
+        if self.running:
+            return False
+        self._task = asyncio.create_task(self._run())
+        return True
+
+    async def _set_status(self, **fields: Any) -> None:
+        await self.redis.hset(
+            CLEANUP_STATUS_KEY, mapping={k: str(v) for k, v in fields.items()}
+        )
+
+    async def _run(self) -> None:
+        job_id = uuid.uuid4().hex[:12]
+        scanned = deleted = 0
+        await self.redis.delete(CLEANUP_STATUS_KEY)
+        await self._set_status(
+            job_id=job_id, status="running", scanned=0, deleted=0,
+            started_at=time.time(), namespace="",
+        )
+
+        try:
+            while self._pending:
+                namespace = self._pending.pop()
+                await self._set_status(namespace=namespace)
+                current = int(await self.redis.hget(VERSIONS_KEY, namespace) or 0)
+
+                batch: List[bytes] = []
+                async for key in self.redis.scan_iter(
+                    match=f"{namespace}:*", count=settings.cache_cleanup_batch_size
+                ):
+                    scanned += 1
+                    if _is_stale(key, current):
+                        batch.append(key)
+                    if len(batch) >= settings.cache_cleanup_batch_size:
+                        deleted += await self._unlink(batch)
+                        await self._set_status(scanned=scanned, deleted=deleted)
+                        # 他のクライアントを待たせないよう小休止
+                        await asyncio.sleep(settings.cache_cleanup_pause)
+                if batch:
+                    deleted += await self._unlink(batch)
+                await self._set_status(scanned=scanned, deleted=deleted)
+
+            await self._set_status(status="completed", namespace="", finished_at=time.time())
+            logger.info(f"Cache cleanup {job_id} completed: scanned={scanned}, deleted={deleted}")
+
+        except Exception as e:
+            logger.error(f"Cache cleanup {job_id} failed: {e}", exc_info=True)
+            await self._set_status(status="failed", error=str(e), finished_at=time.time())
+
+    async def _unlink(self, keys: List[bytes]) -> int:
+        """キーをUNLINKで非同期に解放"""
+        count = len(keys)
+        await self.redis.unlink(*keys)
+        keys.clear()
+        return count
+
+
+async def get_cleanup_status(redis_client: redis.Redis) -> Dict[str, Any]:
+    """
+    削除ジョブの進捗を取得する（全ワーカー共通）
+
+    Returns:
+        Dict[str, Any]: job_id, status, namespace, scanned, deleted など
+    """
+    raw = await redis_client.hgetall(CLEANUP_STATUS_KEY)
+    status = {
+        (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+        for k, v in raw.items()
+    }
+    for field in ("scanned", "deleted"):
+        if field in status:
+            status[field] = int(status[field])
+    for field in ("started_at", "finished_at"):
+        if field in status:
+            status[field] = float(status[field])
+    return status or {"status": "idle"}
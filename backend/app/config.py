@@ -13,10 +13,44 @@ class Settings(BaseSettings):
     # データベース設定
     database_url: str = "sqlite:///./concafe.db"
     postgres_url: Optional[str] = None
+    db_pool_size: int = 10  # 非同期エンジンのコネクションプール（PostgreSQL）
+    db_max_overflow: int = 20
+    sqlite_tuned: bool = True  # WAL・読み取り専用プール・単一書き込み接続を使う
+    sqlite_read_pool_size: int = 8
+    sqlite_writer_timeout: float = 30.0  # 書き込み接続の空き待ち上限（秒）
+    sqlite_busy_timeout: int = 5000  # ロック待ち（ミリ秒）
+    sqlite_cache_size: int = -64000  # ページキャッシュ（負値はKiB、約64MB）
+    sqlite_mmap_size: int = 268435456  # メモリマップI/O（256MB）
+    
+    # キャッシュ設定
+    cache_backend: str = "redis"  # redis, embedded（単一ノード向け、Redis不要）
+    cache_embedded_path: Optional[str] = None  # 組み込みキャッシュのSQLiteファイル（未指定時はプロセス内メモリ）
     
     # Redis設定
     redis_url: str = "redis://localhost:6379"
+    redis_max_connections: int = 50  # ワーカーあたりのコネクションプール上限
+    redis_socket_timeout: float = 5.0
+    redis_health_check_interval: int = 30
     cache_ttl: int = 900  # 15分
+    cache_codec: str = "msgpack"  # msgpack, json
+    cache_compression: str = "zstd"  # zstd, none
+    cache_compress_min_bytes: int = 256  # これ未満の値は圧縮しない
+    cache_zstd_level: int = 3
+    cache_zstd_dict_path: Optional[str] = None  # 共有辞書ファイル（任意）
+    cache_version_check_interval: float = 1.0  # 名前空間バージョンをワーカー内で再利用する秒数
+    cache_cleanup_batch_size: int = 500  # 古いキーをSCAN / UNLINKする単位
+    cache_cleanup_pause: float = 0.01  # バッチ間の休止秒数
+    
+    # HTTPキャッシュ設定（ETag / Cache-Control）
+    http_cache_max_age: int = 60  # ブラウザ・CDNでの鮮度保持秒数
+    http_cache_stale_while_revalidate: int = 300
+    
+    # データ保持設定
+    retention_shift_days: int = 90  # 勤務日がこれより古いシフトを削除
+    retention_log_days: int = 30  # スクレイピングログの保持日数
+    retention_batch_size: int = 1000  # 1回のDELETEで削除する上限件数
+    retention_batch_pause: float = 0.05  # バッチ間の休止秒数（書き込みを先に通す）
+    retention_partition_months_ahead: int = 3  # パーティション化済みの場合に先に作成しておく月数
     
     # スクレイピング設定
     scraping_interval: int = 300  # 5分
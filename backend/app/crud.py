@@ -3,10 +3,13 @@ CRUD操作関数
 データベースの作成・読み取り・更新・削除操作を提供する
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc, func, distinct
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
+from sqlalchemy import and_, case, desc, func, distinct, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import List, Optional, Dict, Any, Iterable, Tuple
+from datetime import date as date_type, datetime, timedelta
 import json
 
 from . import models, schemas
@@ -16,19 +19,34 @@ class StoreRepository:
     """店舗情報のCRUD操作"""
     
     @staticmethod
-    def get_all(db: Session) -> List[models.Store]:
+    async def get_all(db: AsyncSession) -> List[models.Store]:
         """全店舗を取得"""
-        return db.query(models.Store).filter(models.Store.is_active == True).all()
+        result = await db.execute(
+            select(models.Store).where(models.Store.is_active == True)
+        )
+        return list(result.scalars().all())
     
     @staticmethod
-    def get_by_id(db: Session, store_id: str) -> Optional[models.Store]:
+    async def get_by_id(db: AsyncSession, store_id: str) -> Optional[models.Store]:
         """店舗IDで取得"""
-        return db.query(models.Store).filter(models.Store.id == store_id).first()
+        return await db.get(models.Store, store_id)
+    
+    @staticmethod
+    async def get_names(db: AsyncSession, store_ids: List[str]) -> Dict[str, str]:
+        """店舗IDから店舗名への対応表を1クエリで取得"""
+        if not store_ids:
+            return {}
+        result = await db.execute(
+            select(models.Store.id, models.Store.name).where(
+                models.Store.id.in_(set(store_ids))
+            )
+        )
+        return {store_id: name for store_id, name in result.all()}
     
     @staticmethod
-    def create_or_update(db: Session, store_data: Dict[str, Any]) -> models.Store:
+    async def create_or_update(db: AsyncSession, store_data: Dict[str, Any]) -> models.Store:
         """店舗情報を作成または更新"""
-        store = db.query(models.Store).filter(models.Store.id == store_data["id"]).first()
+        store = await db.get(models.Store, store_data["id"])
         
         if store:
             for key, value in store_data.items():
@@ -44,8 +62,8 @@ class StoreRepository:
             store = models.Store(**store_data)
             db.add(store)
         
-        db.commit()
-        db.refresh(store)
+        await db.commit()
+        await db.refresh(store)
         return store
 
 
@@ -53,23 +71,34 @@ class GirlRepository:
     """嬢情報のCRUD操作"""
     
     @staticmethod
-    def get_by_store_and_name(db: Session, store_id: str, name: str) -> Optional[models.Girl]:
+    async def get_by_store_and_name(db: AsyncSession, store_id: str, name: str) -> Optional[models.Girl]:
         """店舗IDと名前で嬢を検索"""
-        return db.query(models.Girl).filter(
-            and_(models.Girl.store_id == store_id, models.Girl.name == name)
-        ).first()
+        result = await db.execute(
+            select(models.Girl).where(
+                and_(models.Girl.store_id == store_id, models.Girl.name == name)
+            ).limit(1)
+        )
+        return result.scalars().first()
     
     @staticmethod
-    def get_by_id(db: Session, girl_id: int) -> Optional[models.Girl]:
+    async def get_by_id(db: AsyncSession, girl_id: int) -> Optional[models.Girl]:
         """嬢IDで取得"""
-        return db.query(models.Girl).filter(models.Girl.id == girl_id).first()
+        return await db.get(models.Girl, girl_id)
     
     @staticmethod
-    def create_or_update(db: Session, store_id: str, name: str, 
-                        image_url: Optional[str] = None, 
-                        status: str = "active") -> models.Girl:
+    async def get_by_store(db: AsyncSession, store_id: str) -> List[models.Girl]:
+        """店舗に所属する嬢を全て取得"""
+        result = await db.execute(
+            select(models.Girl).where(models.Girl.store_id == store_id)
+        )
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def create_or_update(db: AsyncSession, store_id: str, name: str,
+                               image_url: Optional[str] = None,
+                               status: str = "active") -> models.Girl:
         """嬢情報を作成または更新"""
-        girl = GirlRepository.get_by_store_and_name(db, store_id, name)
+        girl = await GirlRepository.get_by_store_and_name(db, store_id, name)
         now = datetime.utcnow()
         
         if girl:
@@ -78,6 +107,7 @@ class GirlRepository:
                 girl.image_url = image_url
             if girl.status == "left" and status == "active":
                 girl.status = "active"  # 復帰した場合
+                await CounterRepository.increment(db, {CounterRepository.GIRLS_ACTIVE: 1})
         else:
             girl = models.Girl(
                 store_id=store_id,
@@ -88,49 +118,65 @@ class GirlRepository:
                 last_seen=now
             )
             db.add(girl)
+            await CounterRepository.increment(db, {
+                CounterRepository.GIRLS_TOTAL: 1,
+                CounterRepository.new_girls_key(now.date()): 1,
+            })
         
-        db.commit()
-        db.refresh(girl)
+        await db.commit()
+        await db.refresh(girl)
         return girl
     
     @staticmethod
-    def mark_as_left(db: Session, girls_to_check: List[models.Girl], 
-                     current_girls: List[str]) -> None:
+    async def mark_as_left(db: AsyncSession, girls_to_check: List[models.Girl],
+                           current_girls: List[str]) -> None:
         """前回いたが今回いない嬢を「LEFT」に設定"""
+        left_active = 0
         for girl in girls_to_check:
             if girl.name not in current_girls and girl.status != "left":
+                if girl.status == "active":
+                    left_active += 1
                 girl.status = "left"
-        db.commit()
+        if left_active:
+            await CounterRepository.increment(db, {CounterRepository.GIRLS_ACTIVE: -left_active})
+        await db.commit()
     
     @staticmethod
-    def get_recent_shifts(db: Session, girl_id: int, limit: int = 30) -> List[models.Shift]:
+    async def get_recent_shifts(db: AsyncSession, girl_id: int, limit: int = 30) -> List[models.Shift]:
         """嬢の直近シフト履歴を取得"""
-        return db.query(models.Shift).filter(
-            models.Shift.girl_id == girl_id
-        ).order_by(desc(models.Shift.date)).limit(limit).all()
+        result = await db.execute(
+            select(models.Shift).where(
+                models.Shift.girl_id == girl_id
+            ).order_by(desc(models.Shift.date)).limit(limit)
+        )
+        return list(result.scalars().all())
 
 
 class ShiftRepository:
     """シフト情報のCRUD操作"""
     
     @staticmethod
-    def create_or_update(db: Session, store_id: str, girl_id: int, 
-                        date: str, start_time: str, end_time: str,
-                        shift_type: str = "regular", notes: Optional[str] = None) -> models.Shift:
-        """シフト情報を作成または更新"""
-        shift = db.query(models.Shift).filter(
-            and_(
-                models.Shift.store_id == store_id,
-                models.Shift.girl_id == girl_id,
-                models.Shift.date == date,
-                models.Shift.start_time == start_time
-            )
-        ).first()
+    async def create_or_update(db: AsyncSession, store_id: str, girl_id: int,
+                               date: str, start_time: str, end_time: str,
+                               shift_type: str = "regular", notes: Optional[str] = None) -> models.Shift:
+        """シフト情報を作成または更新（日付・時刻は従来どおり文字列で受け取る）"""
+        result = await db.execute(
+            select(models.Shift).where(
+                and_(
+                    models.Shift.store_id == store_id,
+                    models.Shift.girl_id == girl_id,
+                    models.Shift.date == models.parse_date(date),
+                    models.Shift.start_minutes == models.time_to_minutes(start_time)
+                )
+            ).limit(1)
+        )
+        shift = result.scalars().first()
         
         if shift:
             shift.end_time = end_time
             shift.shift_type = shift_type
             shift.notes = notes
+            shift.scraped_at = datetime.utcnow()  # 最終確認日時（保持期間の判定には使わない）
         else:
             shift = models.Shift(
                 store_id=store_id,
@@ -142,77 +188,346 @@ class ShiftRepository:
                 notes=notes
             )
             db.add(shift)
+            await CounterRepository.increment(db, {CounterRepository.SHIFTS_TOTAL: 1})
         
-        db.commit()
-        db.refresh(shift)
+        await db.commit()
+        await db.refresh(shift)
         return shift
     
     @staticmethod
-    def get_by_date(db: Session, date: str) -> List[models.Shift]:
-        """指定日の全シフトを取得"""
-        return db.query(models.Shift).join(models.Girl).filter(
-            models.Shift.date == date
-        ).all()
+    async def get_by_date(db: AsyncSession, date: date_type, store_id: Optional[str] = None) -> List[models.Shift]:
+        """指定日の全シフトを嬢情報と合わせて取得（店舗・開始時刻順）"""
+        query = select(models.Shift).join(models.Shift.girl).options(
+            contains_eager(models.Shift.girl)
+        ).where(models.Shift.date == date)
+        
+        if store_id:
+            query = query.where(models.Shift.store_id == store_id)
+        
+        result = await db.execute(
+            query.order_by(models.Shift.store_id, models.Shift.start_minutes)
+        )
+        return list(result.scalars().all())
     
     @staticmethod
-    def get_by_store_and_date_range(db: Session, store_id: str, 
-                                   start_date: str, end_date: str) -> List[models.Shift]:
-        """店舗と期間指定でシフトを取得"""
-        return db.query(models.Shift).join(models.Girl).filter(
-            and_(
+    async def get_by_store_and_date_range(db: AsyncSession, store_id: str,
+                                          start_date: date_type, end_date: date_type) -> List[models.Shift]:
+        """店舗と期間指定でシフトを嬢情報と合わせて取得"""
+        result = await db.execute(
+            select(models.Shift).join(models.Shift.girl).options(
+                contains_eager(models.Shift.girl)
+            ).where(
+                and_(
+                    models.Shift.store_id == store_id,
+                    models.Shift.date >= start_date,
+                    models.Shift.date <= end_date
+                )
+            ).order_by(models.Shift.date, models.Shift.start_minutes)
+        )
+        return list(result.scalars().all())
+
+
+class RollupRepository:
+    """シフト集計（日次・月次ロールアップ）のCRUD操作"""
+    
+    @staticmethod
+    def _month_start(value: date_type) -> date_type:
+        return value.replace(day=1)
+    
+    @staticmethod
+    def _empty_histogram(weekdays: bool = False) -> List:
+        """開始時刻(時)別の空ヒストグラム（weekdays=Trueで曜日×時の7×24）"""
+        if weekdays:
+            return [[0] * 24 for _ in range(7)]
+        return [0] * 24
+    
+    @staticmethod
+    async def _upsert(db: AsyncSession, model: Any, owner_column: Any, period_column: Any,
+                      rows: Dict[Tuple[Any, date_type], Dict[str, Any]]) -> None:
+        """(所有者ID, 日付) -> 集計値 の行をまとめて作成または更新"""
+        if not rows:
+            return
+        result = await db.execute(
+            select(model).where(
+                owner_column.in_({owner for owner, _ in rows}),
+                period_column.in_({period for _, period in rows})
+            )
+        )
+        existing = {
+            (getattr(row, owner_column.key), getattr(row, period_column.key)): row
+            for row in result.scalars()
+        }
+        for key, values in rows.items():
+            row = existing.get(key)
+            if row is None:
+                row = model(**{owner_column.key: key[0], period_column.key: key[1]})
+                db.add(row)
+            for name, value in values.items():
+                setattr(row, name, value)
+    
+    @staticmethod
+    async def refresh(db: AsyncSession, store_id: str,
+                      girl_dates: Iterable[Tuple[int, date_type]]) -> None:
+        """
+        保存したシフトの集計を更新する
+        
+        対象の嬢・日付の日次集計だけを生シフトから再計算し、
+        月次・店舗別の集計は該当する日次集計から積み上げる。
+        同じシフトを何度保存しても結果は変わらない
+        
+        Args:
+            db: 書き込み用セッション
+            store_id: 店舗ID
+            girl_dates: 保存したシフトの (嬢ID, 勤務日)
+        """
+        keys = set(girl_dates)
+        if not keys:
+            return
+        girl_ids = {girl_id for girl_id, _ in keys}
+        dates = {day for _, day in keys}
+        months = {RollupRepository._month_start(day) for day in dates}
+        first_month = min(months)
+        next_month = (max(months) + timedelta(days=32)).replace(day=1)
+        
+        # 嬢別の日次集計（生シフトから）
+        result = await db.execute(
+            select(
+                models.Shift.girl_id, models.Shift.date,
+                models.Shift.start_minutes, models.Shift.end_minutes
+            ).where(
                 models.Shift.store_id == store_id,
-                models.Shift.date >= start_date,
-                models.Shift.date <= end_date
+                models.Shift.girl_id.in_(girl_ids),
+                models.Shift.date.in_(dates)
+            )
+        )
+        girl_daily = {
+            key: {"store_id": store_id, "shift_count": 0, "total_minutes": 0,
+                  "hour_histogram": RollupRepository._empty_histogram()}
+            for key in keys
+        }
+        for girl_id, day, start_minutes, end_minutes in result:
+            values = girl_daily.get((girl_id, day))
+            if values is None:
+                continue
+            values["shift_count"] += 1
+            values["total_minutes"] += end_minutes - start_minutes
+            values["hour_histogram"][start_minutes // 60] += 1
+        for values in girl_daily.values():
+            values["hour_histogram"] = json.dumps(values["hour_histogram"])
+        await RollupRepository._upsert(
+            db, models.GirlDailyStats, models.GirlDailyStats.girl_id,
+            models.GirlDailyStats.date, girl_daily
+        )
+        await db.flush()
+        
+        # 嬢別の月次集計と店舗別の日次集計（嬢別の日次集計から）
+        result = await db.execute(
+            select(models.GirlDailyStats).where(
+                models.GirlDailyStats.store_id == store_id,
+                models.GirlDailyStats.date >= first_month,
+                models.GirlDailyStats.date < next_month
+            )
+        )
+        touched_months = {(girl_id, RollupRepository._month_start(day)) for girl_id, day in keys}
+        girl_monthly, store_daily = {}, {}
+        for daily in result.scalars():
+            histogram = json.loads(daily.hour_histogram)
+            month_key = (daily.girl_id, RollupRepository._month_start(daily.date))
+            if month_key in touched_months:
+                monthly = girl_monthly.setdefault(month_key, {
+                    "store_id": store_id, "shift_count": 0, "work_days": 0, "total_minutes": 0,
+                    "hour_histogram": RollupRepository._empty_histogram(weekdays=True)
+                })
+                monthly["shift_count"] += daily.shift_count
+                monthly["work_days"] += 1 if daily.shift_count else 0
+                monthly["total_minutes"] += daily.total_minutes
+                for hour, count in enumerate(histogram):
+                    monthly["hour_histogram"][daily.date.weekday()][hour] += count
+            if daily.date in dates:
+                day_values = store_daily.setdefault((store_id, daily.date), {
+                    "shift_count": 0, "girl_count": 0, "total_minutes": 0,
+                    "hour_histogram": RollupRepository._empty_histogram()
+                })
+                day_values["shift_count"] += daily.shift_count
+                day_values["girl_count"] += 1 if daily.shift_count else 0
+                day_values["total_minutes"] += daily.total_minutes
+                for hour, count in enumerate(histogram):
+                    day_values["hour_histogram"][hour] += count
+        for values in list(girl_monthly.values()) + list(store_daily.values()):
+            values["hour_histogram"] = json.dumps(values["hour_histogram"])
+        await RollupRepository._upsert(
+            db, models.GirlMonthlyStats, models.GirlMonthlyStats.girl_id,
+            models.GirlMonthlyStats.month, girl_monthly
+        )
+        await RollupRepository._upsert(
+            db, models.StoreDailyStats, models.StoreDailyStats.store_id,
+            models.StoreDailyStats.date, store_daily
+        )
+        await db.flush()
+        
+        # 店舗別の月次集計（店舗別の日次集計から）
+        result = await db.execute(
+            select(models.StoreDailyStats).where(
+                models.StoreDailyStats.store_id == store_id,
+                models.StoreDailyStats.date >= first_month,
+                models.StoreDailyStats.date < next_month
             )
-        ).order_by(models.Shift.date, models.Shift.start_time).all()
+        )
+        store_monthly = {}
+        for daily in result.scalars():
+            monthly = store_monthly.setdefault((store_id, RollupRepository._month_start(daily.date)), {
+                "shift_count": 0, "girl_days": 0, "total_minutes": 0,
+                "hour_histogram": RollupRepository._empty_histogram(weekdays=True)
+            })
+            monthly["shift_count"] += daily.shift_count
+            monthly["girl_days"] += daily.girl_count
+            monthly["total_minutes"] += daily.total_minutes
+            for hour, count in enumerate(json.loads(daily.hour_histogram)):
+                monthly["hour_histogram"][daily.date.weekday()][hour] += count
+        for values in store_monthly.values():
+            values["hour_histogram"] = json.dumps(values["hour_histogram"])
+        await RollupRepository._upsert(
+            db, models.StoreMonthlyStats, models.StoreMonthlyStats.store_id,
+            models.StoreMonthlyStats.month, store_monthly
+        )
+        
+        await db.commit()
+    
+    @staticmethod
+    async def get_girl_summary(db: AsyncSession, girl_id: int) -> Dict[str, Any]:
+        """
+        嬢の累計集計を月次集計から取得する
+        
+        Returns:
+            Dict[str, Any]: shift_count, work_days, total_minutes と
+                曜日×開始時刻(時)のヒストグラム hour_histogram [7][24]
+        """
+        result = await db.execute(
+            select(models.GirlMonthlyStats).where(models.GirlMonthlyStats.girl_id == girl_id)
+        )
+        summary = {
+            "shift_count": 0, "work_days": 0, "total_minutes": 0,
+            "hour_histogram": RollupRepository._empty_histogram(weekdays=True)
+        }
+        for monthly in result.scalars():
+            summary["shift_count"] += monthly.shift_count
+            summary["work_days"] += monthly.work_days
+            summary["total_minutes"] += monthly.total_minutes
+            for weekday, hours in enumerate(json.loads(monthly.hour_histogram)):
+                for hour, count in enumerate(hours):
+                    summary["hour_histogram"][weekday][hour] += count
+        return summary
+    
+    @staticmethod
+    async def get_total_shifts(db: AsyncSession) -> int:
+        """保持期間に削除されたものを含む累計シフト数"""
+        return await db.scalar(
+            select(func.coalesce(func.sum(models.StoreMonthlyStats.shift_count), 0))
+        )
+
+
+class CounterRepository:
+    """管理画面用の集計カウンターの操作"""
+    
+    GIRLS_TOTAL = "girls_total"
+    GIRLS_ACTIVE = "girls_active"
+    SHIFTS_TOTAL = "shifts_total"  # 保持期間で削除されたシフトも含む累計
+    GIRLS_NEW = "girls_new"
+    
+    @staticmethod
+    def new_girls_key(day: date_type) -> str:
+        """指定日（UTC）に新規発見した嬢数のカウンター名"""
+        return f"{CounterRepository.GIRLS_NEW}:{day.isoformat()}"
+    
+    @staticmethod
+    async def increment(db: AsyncSession, deltas: Dict[str, int]) -> None:
+        """
+        カウンターを増減する（コミットは呼び出し側のトランザクションで行う）
+        
+        Args:
+            db: 書き込み用セッション
+            deltas: カウンター名 -> 増減値
+        """
+        insert = postgresql_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+        for name, delta in deltas.items():
+            statement = insert(models.StatsCounter).values(name=name, value=delta)
+            await db.execute(statement.on_conflict_do_update(
+                index_elements=[models.StatsCounter.name],
+                set_={"value": models.StatsCounter.value + delta}
+            ))
 
 
 class AdminRepository:
     """管理者向けCRUD操作"""
     
     @staticmethod
-    def get_stats(db: Session) -> Dict[str, Any]:
-        """統計情報を取得"""
-        today = datetime.now().strftime("%Y-%m-%d")
-        
-        total_stores = db.query(func.count(models.Store.id)).filter(
-            models.Store.is_active == True
-        ).scalar()
+    async def get_stats(db: AsyncSession) -> Dict[str, Any]:
+        """
+        統計情報を1クエリで取得する
         
-        total_girls = db.query(func.count(models.Girl.id)).scalar()
-        active_girls = db.query(func.count(models.Girl.id)).filter(
-            models.Girl.status == "active"
-        ).scalar()
+        店舗数以外はスクレイピング時に更新するカウンターから読むため、
+        嬢・シフトの件数に関係なく一定時間で返る
+        """
+        counters = models.StatsCounter
         
-        new_girls_today = db.query(func.count(models.Girl.id)).filter(
-            and_(
-                models.Girl.status == "new",
-                func.date(models.Girl.first_seen) == today
-            )
-        ).scalar()
+        def counter(name: str):
+            return func.coalesce(func.max(case((counters.name == name, counters.value))), 0)
         
-        total_shifts = db.query(func.count(models.Shift.id)).scalar()
+        new_girls_key = CounterRepository.new_girls_key(datetime.utcnow().date())
+        total_stores = select(func.count(models.Store.id)).where(
+            models.Store.is_active == True
+        ).scalar_subquery()
         
-        return {
-            "total_stores": total_stores,
-            "total_girls": total_girls,
-            "total_shifts": total_shifts,
-            "active_girls": active_girls,
-            "new_girls_today": new_girls_today
-        }
+        result = await db.execute(
+            select(
+                total_stores.label("total_stores"),
+                counter(CounterRepository.GIRLS_TOTAL).label("total_girls"),
+                counter(CounterRepository.SHIFTS_TOTAL).label("total_shifts"),
+                counter(CounterRepository.GIRLS_ACTIVE).label("active_girls"),
+                counter(new_girls_key).label("new_girls_today")
+            ).where(
+                counters.name.in_([
+                    CounterRepository.GIRLS_TOTAL, CounterRepository.SHIFTS_TOTAL,
+                    CounterRepository.GIRLS_ACTIVE, new_girls_key
+                ])
+            )
+        )
+        return dict(result.one()._mapping)
     
     @staticmethod
-    def get_scraping_logs(db: Session, limit: int = 10) -> List[models.ScrapingLog]:
-        """最新のスクレイピングログを取得"""
-        return db.query(models.ScrapingLog).order_by(
+    async def get_latest_scraping_logs(db: AsyncSession) -> List[Tuple[models.ScrapingLog, str]]:
+        """店舗ごとの最新のスクレイピングログを店舗名と合わせて取得（新しい順）"""
+        latest_log_id = select(models.ScrapingLog.id).where(
+            models.ScrapingLog.store_id == models.Store.id
+        ).order_by(
             desc(models.ScrapingLog.started_at)
-        ).limit(limit).all()
+        ).limit(1).correlate(models.Store).scalar_subquery()
+        
+        result = await db.execute(
+            select(models.ScrapingLog, models.Store.name).select_from(models.Store).join(
+                models.ScrapingLog, models.ScrapingLog.id == latest_log_id
+            ).order_by(desc(models.ScrapingLog.started_at))
+        )
+        return [(log, store_name) for log, store_name in result.all()]
+    
+    @staticmethod
+    async def get_scraping_logs(db: AsyncSession,
+                                limit: int = 10) -> List[Tuple[models.ScrapingLog, Optional[str]]]:
+        """最新のスクレイピングログを店舗名と合わせて取得"""
+        result = await db.execute(
+            select(models.ScrapingLog, models.Store.name).outerjoin(
+                models.Store, models.Store.id == models.ScrapingLog.store_id
+            ).order_by(
+                desc(models.ScrapingLog.started_at)
+            ).limit(limit)
+        )
+        return [(log, store_name) for log, store_name in result.all()]
     
     @staticmethod
-    def create_scraping_log(db: Session, store_id: str, status: str,
-                           girls_found: int = 0, shifts_found: int = 0,
-                           error_message: Optional[str] = None,
-                           execution_time: Optional[int] = None) -> models.ScrapingLog:
+    async def create_scraping_log(db: AsyncSession, store_id: str, status: str,
+                                  girls_found: int = 0, shifts_found: int = 0,
+                                  error_message: Optional[str] = None,
+                                  execution_time: Optional[int] = None) -> models.ScrapingLog:
         """スクレイピングログを作成"""
         log = models.ScrapingLog(
             store_id=store_id,
@@ -224,6 +539,6 @@ class AdminRepository:
             completed_at=datetime.utcnow() if status != "running" else None
         )
         db.add(log)
-        db.commit()
-        db.refresh(log)
+        await db.commit()
+        await db.refresh(log)
         return log
\ No newline at end of file
@@ -3,39 +3,181 @@
 SQLAlchemyを使用したDB操作の基盤を提供する
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine,
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
-from typing import Generator
-import redis
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+from pathlib import Path
+from typing import AsyncGenerator, Generator, Optional, Tuple, Union
+from redis import asyncio as redis
 from .config import settings
+from .cache.backends import EmbeddedCache, create_cache_backend
 
-# SQLAlchemy設定
+
+
+def is_sqlite_memory(url: str) -> bool:
+    """インメモリSQLite（接続ごとに別DBになるため1接続を共有する必要がある）か判定"""
+    database = make_url(url).database
+    return not database or database == ":memory:" or "mode=memory" in database
+
+
+def apply_sqlite_pragmas(engine: Engine, read_only: bool = False) -> None:
+    """
+    SQLiteの接続ごとにチューニング用のPRAGMAを設定する
+    
+    WALにより読み取りと書き込みが互いをブロックしなくなる。
+    WALはDBファイルに記録されるため、読み取り専用接続では設定しない
+    
+    Args:
+        engine: 同期エンジン（非同期エンジンの場合は .sync_engine）
+        read_only: 読み取り専用接続の場合True
+    """
+    pragmas = [
+        f"PRAGMA busy_timeout = {settings.sqlite_busy_timeout}",
+        f"PRAGMA cache_size = {settings.sqlite_cache_size}",
+        f"PRAGMA mmap_size = {settings.sqlite_mmap_size}",
+    ]
+    if not read_only:
+        pragmas += [
+            "PRAGMA journal_mode = WAL",
+            "PRAGMA synchronous = NORMAL",
+        ]
+    
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+# SQLAlchemy設定（同期エンジンはテーブル作成・スクリプト用）
 if settings.postgres_url:
     engine = create_engine(
         settings.postgres_url,
         pool_pre_ping=True,
         echo=False
     )
-else:
+elif "sqlite" in settings.database_url:
     engine = create_engine(
         settings.database_url,
-        connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {},
-        poolclass=StaticPool if "sqlite" in settings.database_url else None,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool if is_sqlite_memory(settings.database_url) else None,
         echo=False
     )
+    if settings.sqlite_tuned and not is_sqlite_memory(settings.database_url):
+        apply_sqlite_pragmas(engine)
+else:
+    engine = create_engine(settings.database_url, echo=False)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-# Redis接続
-redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+# 非同期ドライバ（PostgreSQL: asyncpg / SQLite: aiosqlite）
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """
+    同期用の接続URLを非同期ドライバのURLに変換する
+    
+    Args:
+        url: 接続URL（例: postgresql://..., sqlite:///./concafe.db）
+        
+    Returns:
+        str: 非同期ドライバを指定した接続URL
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend in ASYNC_DRIVERS and parsed.drivername != ASYNC_DRIVERS[backend]:
+        parsed = parsed.set(drivername=ASYNC_DRIVERS[backend])
+    return parsed.render_as_string(hide_password=False)
+
+
+def create_sqlite_engines(url: str) -> Tuple[AsyncEngine, AsyncEngine]:
+    """
+    SQLite用の書き込みエンジンと読み取りエンジンを作成する
+    
+    書き込みは専用の1接続に集約して直列化し（SQLiteの書き込みは同時に1つのみ）、
+    読み取りは読み取り専用接続のプールで並行に処理する
+    
+    Args:
+        url: SQLiteの接続URL（同期・非同期どちらの形式でも可）
+        
+    Returns:
+        Tuple[AsyncEngine, AsyncEngine]: (書き込みエンジン, 読み取りエンジン)
+    """
+    async_url = make_url(to_async_url(url))
+    
+    if is_sqlite_memory(url) or not settings.sqlite_tuned:
+        # 従来モード: 1接続を全リクエストで共有
+        writer = create_async_engine(async_url, poolclass=StaticPool, echo=False)
+        return writer, writer
+    
+    writer = create_async_engine(
+        async_url,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.sqlite_writer_timeout,
+        echo=False
+    )
+    apply_sqlite_pragmas(writer.sync_engine)
+    
+    reader = create_async_engine(
+        async_url.set(
+            database=f"file:{async_url.database}",
+            query={"mode": "ro", "uri": "true"},
+        ),
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=settings.sqlite_read_pool_size,
+        max_overflow=0,
+        echo=False
+    )
+    apply_sqlite_pragmas(reader.sync_engine, read_only=True)
+    return writer, reader
+
+
+# 非同期エンジン（クエリ中もイベントループをブロックしない）
+# async_engineは書き込み用、read_engineはAPIの読み取り用（PostgreSQLでは同一）
+if settings.postgres_url:
+    async_engine = create_async_engine(
+        to_async_url(settings.postgres_url),
+        pool_pre_ping=True,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        echo=False
+    )
+    read_engine = async_engine
+elif "sqlite" in settings.database_url:
+    async_engine, read_engine = create_sqlite_engines(settings.database_url)
+else:
+    async_engine = create_async_engine(to_async_url(settings.database_url), echo=False)
+    read_engine = async_engine
+
+# コミット後に属性を失効させない（非同期では遅延ロードができないため）
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+AsyncReadSessionLocal = async_sessionmaker(
+    read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+# キャッシュ接続（Redisまたは組み込みキャッシュ、値はエンコード済みバイト列）
+# Redisの場合はasyncioクライアントとコネクションプールを共有し、イベントループをブロックしない
+redis_client = create_cache_backend()
 
 
 def get_db() -> Generator[Session, None, None]:
     """
-    データベースセッションを取得する依存性注入用関数
+    同期データベースセッションを取得する（スクリプト・マイグレーション用）
     
     Yields:
         Session: SQLAlchemyセッション
@@ -47,19 +189,99 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
-def get_redis() -> redis.Redis:
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    非同期データベースセッションを取得する依存性注入用関数（APIの読み取り用）
+    
+    書き込みはAsyncSessionLocal（SQLiteでは単一の書き込み接続）を使うこと
+    
+    Yields:
+        AsyncSession: SQLAlchemy非同期セッション
+    """
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
+def get_redis() -> Union[redis.Redis, EmbeddedCache]:
     """
-    Redisクライアントを取得する
+    キャッシュクライアントを取得する
     
     Returns:
-        redis.Redis: Redisクライアント
+        Union[redis.Redis, EmbeddedCache]: 設定cache_backendに応じたクライアント
+        （どちらもredis.asyncio互換のインターフェース）
     """
     return redis_client
 
 
-def init_db() -> None:
+async def close_redis() -> None:
+    """
+    キャッシュの接続（Redisのコネクションプール等）を閉じる
+    アプリケーション終了時に呼び出す
+    """
+    await redis_client.aclose(close_connection_pool=True)
+
+
+async def close_db() -> None:
+    """
+    非同期エンジンのコネクションプールを閉じる
+    アプリケーション終了時に呼び出す
+    """
+    await async_engine.dispose()
+    if read_engine is not async_engine:
+        await read_engine.dispose()
+
+
+# Alembicの設定（backend/alembic.ini）と、create_allのみで作成された既存DBの基準リビジョン
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+BASELINE_REVISION = "0001"
+
+
+def get_alembic_config(url: Optional[str] = None):
+    """
+    アプリケーションから実行するためのAlembic設定を作成する
+    
+    Args:
+        url: 接続URL（省略時は設定のDB）
+        
+    Returns:
+        alembic.config.Config: Alembic設定
+    """
+    from alembic.config import Config
+    
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    # configparserの補間を避けるため % をエスケープ
+    db_url = url or engine.url.render_as_string(hide_password=False)
+    config.set_main_option("sqlalchemy.url", db_url.replace("%", "%%"))
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def init_db(url: Optional[str] = None) -> None:
     """
     データベースの初期化を行う
-    テーブル作成とインデックス設定を実行する
+    
+    新規DBはテーブルを作成して最新リビジョンを記録し、
+    既存DBはAlembicのマイグレーションを最新まで適用する
+    （マイグレーション導入前のDBは基準リビジョンとして記録してから適用）
+    
+    Args:
+        url: 接続URL（省略時は設定のDB）
     """
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    from alembic import command
+    from . import models  # noqa: F401  モデルをメタデータに登録
+    
+    config = get_alembic_config(url)
+    target = create_engine(url) if url else engine
+    inspector = inspect(target)
+    
+    if not inspector.has_table("shifts"):
+        Base.metadata.create_all(bind=target)
+        command.stamp(config, "head")
+    else:
+        if not inspector.has_table("alembic_version"):
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, "head")
+    
+    if url:
+        target.dispose()
\ No newline at end of file
@@ -13,7 +13,7 @@ import time
 from pathlib import Path
 
 from .config import settings
-from .database import init_db
+from .database import init_db, close_db, close_redis
 from .api.v1.api import api_router
 from .scraper.scheduler import ScrapingScheduler
 
@@ -66,6 +66,9 @@ async def lifespan(app: FastAPI):
     if scheduler:
         scheduler.shutdown()
         logger.info("Scraping scheduler shut down")
+    
+    await close_redis()
+    await close_db()
 
 
 # FastAPIアプリケーション作成
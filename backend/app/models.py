@@ -3,11 +3,48 @@
 店舗、嬢、シフト情報を管理するSQLAlchemyモデル
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Index
-from sqlalchemy.orm import relationship
+from datetime import date as date_type, datetime
+from typing import Union
+
+from sqlalchemy import (
+    Column, Integer, SmallInteger, String, Date, DateTime, Text, Boolean, ForeignKey, Index,
+    event,
+)
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from .database import Base
 
+MINUTES_PER_DAY = 24 * 60
+
+
+def parse_date(value: Union[str, date_type]) -> date_type:
+    """"YYYY-MM-DD" 形式の文字列をdateに変換（date型はそのまま返す）"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date_type):
+        return value
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def time_to_minutes(value: str) -> int:
+    """
+    "HH:MM" 形式の時刻を0:00からの分数に変換する
+    
+    Args:
+        value: 時刻（"18:00"、深夜表記の "25:30" も可）
+    
+    Returns:
+        int: 分数（"18:00" -> 1080）
+    """
+    hours, minutes = value.strip().split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def minutes_to_time(minutes: int) -> str:
+    """0:00からの分数を "HH:MM" 形式に変換（日付を跨ぐ分は24時間で折り返す）"""
+    minutes %= MINUTES_PER_DAY
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
 
 class Store(Base):
     """店舗情報モデル"""
@@ -55,6 +92,9 @@ class Girl(Base):
     __table_args__ = (
         Index("idx_girls_store_name", "store_id", "name"),
         Index("idx_girls_status", "status"),
+        # 一覧のキーセットページネーション用（最終確認日時の新しい順）
+        Index("idx_girls_last_seen", "last_seen", "id"),
+        Index("idx_girls_store_last_seen", "store_id", "last_seen", "id"),
     )
 
 
@@ -65,9 +105,9 @@ class Shift(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     store_id = Column(String, ForeignKey("stores.id"), nullable=False)
     girl_id = Column(Integer, ForeignKey("girls.id"), nullable=False)
-    date = Column(String(10), nullable=False)  # "2024-01-15"
-    start_time = Column(String(5), nullable=False)  # "18:00"
-    end_time = Column(String(5), nullable=False)  # "22:00"
+    date = Column(Date, nullable=False)  # 2024-01-15（勤務開始日）
+    start_minutes = Column(SmallInteger, nullable=False)  # 勤務日0:00からの分 (18:00 -> 1080)
+    end_minutes = Column(SmallInteger, nullable=False)  # 日付を跨ぐ場合は1440以上 (翌1:00 -> 1500)
     shift_type = Column(String(20), default="regular")  # regular, special, event
     notes = Column(Text)  # 特記事項
     scraped_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -76,12 +116,45 @@ class Shift(Base):
     store = relationship("Store", back_populates="shifts")
     girl = relationship("Girl", back_populates="shifts")
     
-    # インデックス
+    # インデックス（日付＋開始時刻の範囲検索用）
     __table_args__ = (
-        Index("idx_shifts_date", "date"),
-        Index("idx_shifts_store_date", "store_id", "date"),
+        Index("idx_shifts_date_start", "date", "start_minutes"),
+        Index("idx_shifts_store_date_start", "store_id", "date", "start_minutes"),
         Index("idx_shifts_girl_date", "girl_id", "date"),
+        # 検索のキーセットページネーション用（日付の新しい順、同日は開始時刻・ID順）
+        Index("idx_shifts_date_desc_start", date.desc(), start_minutes, id),
     )
+    
+    @validates("date")
+    def _validate_date(self, key, value):
+        return parse_date(value)
+    
+    @property
+    def start_time(self) -> str:
+        """開始時刻 ("HH:MM")"""
+        return minutes_to_time(self.start_minutes)
+    
+    @start_time.setter
+    def start_time(self, value: str) -> None:
+        self.start_minutes = time_to_minutes(value)
+    
+    @property
+    def end_time(self) -> str:
+        """終了時刻 ("HH:MM"、日付を跨ぐ場合は翌日の時刻)"""
+        return minutes_to_time(self.end_minutes)
+    
+    @end_time.setter
+    def end_time(self, value: str) -> None:
+        self.end_minutes = time_to_minutes(value)
+
+
+@event.listens_for(Shift, "before_insert")
+@event.listens_for(Shift, "before_update")
+def _normalize_overnight_shift(mapper, connection, shift: Shift) -> None:
+    """終了が開始以前のシフト（"20:00-01:00" など）は翌日終了として扱う"""
+    if shift.end_minutes is not None and shift.start_minutes is not None:
+        if shift.end_minutes <= shift.start_minutes:
+            shift.end_minutes += MINUTES_PER_DAY
 
 
 class ScrapingLog(Base):
@@ -101,4 +174,66 @@ class ScrapingLog(Base):
     # インデックス
     __table_args__ = (
         Index("idx_scraping_logs_store_date", "store_id", "started_at"),
-    )
\ No newline at end of file
+        Index("idx_scraping_logs_started_at", "started_at"),  # 保持期間の削除用
+    )
+
+
+class GirlDailyStats(Base):
+    """嬢別の日次シフト集計（生シフトの保持期間後も残る）"""
+    __tablename__ = "girl_daily_stats"
+    
+    girl_id = Column(Integer, ForeignKey("girls.id"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    store_id = Column(String, ForeignKey("stores.id"), nullable=False)
+    shift_count = Column(Integer, nullable=False, default=0)
+    total_minutes = Column(Integer, nullable=False, default=0)
+    hour_histogram = Column(Text, nullable=False)  # 開始時刻(時)別のシフト数 JSON [24]
+    
+    __table_args__ = (
+        Index("idx_girl_daily_stats_store_date", "store_id", "date"),
+    )
+
+
+class GirlMonthlyStats(Base):
+    """嬢別の月次シフト集計"""
+    __tablename__ = "girl_monthly_stats"
+    
+    girl_id = Column(Integer, ForeignKey("girls.id"), primary_key=True)
+    month = Column(Date, primary_key=True)  # 月初日
+    store_id = Column(String, ForeignKey("stores.id"), nullable=False)
+    shift_count = Column(Integer, nullable=False, default=0)
+    work_days = Column(Integer, nullable=False, default=0)
+    total_minutes = Column(Integer, nullable=False, default=0)
+    hour_histogram = Column(Text, nullable=False)  # 曜日×開始時刻(時)別のシフト数 JSON [7][24]（月曜=0）
+
+
+class StoreDailyStats(Base):
+    """店舗別の日次シフト集計"""
+    __tablename__ = "store_daily_stats"
+    
+    store_id = Column(String, ForeignKey("stores.id"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    shift_count = Column(Integer, nullable=False, default=0)
+    girl_count = Column(Integer, nullable=False, default=0)  # 出勤した嬢の人数
+    total_minutes = Column(Integer, nullable=False, default=0)
+    hour_histogram = Column(Text, nullable=False)  # 開始時刻(時)別のシフト数 JSON [24]
+
+
+class StoreMonthlyStats(Base):
+    """店舗別の月次シフト集計"""
+    __tablename__ = "store_monthly_stats"
+    
+    store_id = Column(String, ForeignKey("stores.id"), primary_key=True)
+    month = Column(Date, primary_key=True)  # 月初日
+    shift_count = Column(Integer, nullable=False, default=0)
+    girl_days = Column(Integer, nullable=False, default=0)  # 嬢ごとの出勤日数の合計
+    total_minutes = Column(Integer, nullable=False, default=0)
+    hour_histogram = Column(Text, nullable=False)  # 曜日×開始時刻(時)別のシフト数 JSON [7][24]（月曜=0）
+
+
+class StatsCounter(Base):
+    """管理画面用の集計カウンター（スクレイピングのトランザクション内で増減する）"""
+    __tablename__ = "stats_counters"
+    
+    name = Column(String(50), primary_key=True)  # girls_total, girls_active, shifts_total, girls_new:2024-01-15
+    value = Column(Integer, nullable=False, default=0)
\ No newline at end of file
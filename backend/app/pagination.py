@@ -0,0 +1,116 @@
+"""
+カーソル（キーセット）ページネーション
+並び順の列の値を不透明なカーソル文字列にし、OFFSETを使わずに次のページを取得する
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import Response
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.sql.elements import ColumnElement
+
+# 次ページのカーソルを返すレスポンスヘッダー
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# (列, 降順か) の並び
+SortKey = Sequence[Tuple[Any, bool]]
+
+
+class InvalidCursor(ValueError):
+    """カーソル文字列を解釈できない"""
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """並び順の列の値をカーソル文字列にする"""
+    payload = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    カーソル文字列を列の値に戻す
+
+    Args:
+        cursor: encode_cursorで作成したカーソル
+        size: 並び順の列数
+
+    Returns:
+        List[Any]: 列の値
+
+    Raises:
+        InvalidCursor: 形式が不正な場合
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = [_decode_value(value) for value in json.loads(payload)]
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(str(e)) from e
+    if len(values) != size:
+        raise InvalidCursor("cursor does not match the sort order")
+    return values
+
+
+def after_cursor(sort_key: SortKey, values: Sequence[Any]) -> ColumnElement:
+    """
+    並び順でカーソル位置より後ろの行を選ぶ条件
+
+    向きが揃っていれば行値比較 (a, b) < (x, y) にしてインデックスの範囲検索を使う。
+    向きが混在する場合は a < x OR (a = x AND b > y) ... に展開する
+    """
+    columns = [column for column, _ in sort_key]
+    directions = {descending for _, descending in sort_key}
+    if len(directions) == 1:
+        if directions.pop():
+            return tuple_(*columns) < tuple_(*values)
+        return tuple_(*columns) > tuple_(*values)
+
+    clauses = []
+    for index, (column, descending) in enumerate(sort_key):
+        equal = [prefix == value for prefix, value in zip(columns[:index], values[:index])]
+        clauses.append(and_(*equal, column < values[index] if descending else column > values[index]))
+    return or_(*clauses)
+
+
+def order_by(sort_key: SortKey) -> List[Any]:
+    """並び順をORDER BY句に変換"""
+    return [column.desc() if descending else column.asc() for column, descending in sort_key]
+
+
+def set_next_cursor(response: Response, rows: List[Any], limit: int,
+                    key: Any) -> List[Any]:
+    """
+    limit+1件取得した結果から次ページの有無を判定し、カーソルをヘッダーに設定する
+
+    Args:
+        response: レスポンス
+        rows: limit+1件まで取得した行
+        limit: ページサイズ
+        key: 行から並び順の列の値を取り出す関数
+
+    Returns:
+        List[Any]: ページ内の行（limit件まで）
+    """
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(key(rows[-1]))
+    return rows
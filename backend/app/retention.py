@@ -0,0 +1,275 @@
+"""
+データ保持期間の管理
+古いシフト（勤務日基準）とスクレイピングログを上限件数ずつ削除し、
+長時間のロックやWALの肥大化を避ける
+
+PostgreSQLでは shifts / scraping_logs を月単位のレンジパーティションに変換でき、
+変換済みのテーブルは期限切れの月をパーティションごと削除する
+"""
+
+import asyncio
+import logging
+import re
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select, delete, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, async_sessionmaker
+from sqlalchemy.schema import CreateIndex
+
+from . import models
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# パーティション化するテーブルとパーティションキー
+PARTITIONED_TABLES = {
+    "shifts": "date",
+    "scraping_logs": "started_at",
+}
+
+_PARTITION_NAME = re.compile(r"^(?P<table>\w+)_p(?P<year>\d{4})(?P<month>\d{2})$")
+
+
+def _month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def _add_months(value: date, months: int) -> date:
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """月パーティションのテーブル名（例: shifts_p202401）"""
+    return f"{table}_p{month:%Y%m}"
+
+
+async def delete_in_batches(session_factory: async_sessionmaker, model: Any,
+                            condition: Any, batch_size: Optional[int] = None,
+                            pause: Optional[float] = None) -> int:
+    """
+    条件に一致する行を上限件数ずつ削除する
+
+    バッチごとにコミットし、間に休止を入れてスクレイパーの書き込みを先に通す
+
+    Args:
+        session_factory: 書き込み用セッションファクトリ
+        model: 対象モデル（主キーidを持つこと）
+        condition: 削除条件
+        batch_size: 1回に削除する上限件数
+        pause: バッチ間の休止秒数
+
+    Returns:
+        int: 削除した件数
+    """
+    batch_size = batch_size or settings.retention_batch_size
+    pause = settings.retention_batch_pause if pause is None else pause
+    deleted = 0
+
+    while True:
+        async with session_factory() as db:
+            ids = select(model.id).where(condition).limit(batch_size).scalar_subquery()
+            result = await db.execute(
+                delete(model).where(model.id.in_(ids)).execution_options(
+                    synchronize_session=False
+                )
+            )
+            await db.commit()
+
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+        await asyncio.sleep(pause)
+
+
+async def is_partitioned(conn: AsyncConnection, table: str) -> bool:
+    """テーブルがパーティション化済みか判定（PostgreSQL以外は常にFalse）"""
+    if conn.dialect.name != "postgresql":
+        return False
+    result = await conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = :table"
+    ), {"table": table})
+    return result.first() is not None
+
+
+async def list_partitions(conn: AsyncConnection, table: str) -> Dict[str, date]:
+    """
+    月パーティションの一覧を取得する
+
+    Returns:
+        Dict[str, date]: パーティション名 -> 対象月の初日
+    """
+    result = await conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = :table"
+    ), {"table": table})
+
+    partitions = {}
+    for (name,) in result:
+        match = _PARTITION_NAME.match(name)
+        if match and match.group("table") == table:
+            partitions[name] = date(int(match.group("year")), int(match.group("month")), 1)
+    return partitions
+
+
+async def ensure_partitions(conn: AsyncConnection, table: str, first_month: date,
+                            months_ahead: Optional[int] = None) -> List[str]:
+    """
+    first_monthから今月＋months_aheadか月分のパーティションを作成する（作成済みは飛ばす）
+
+    Returns:
+        List[str]: 作成したパーティション名
+    """
+    months_ahead = settings.retention_partition_months_ahead if months_ahead is None else months_ahead
+    last_month = _add_months(_month_start(date.today()), months_ahead)
+    existing = await list_partitions(conn, table)
+
+    created = []
+    month = _month_start(first_month)
+    while month <= last_month:
+        name = partition_name(table, month)
+        if name not in existing:
+            await conn.execute(text(
+                f'CREATE TABLE "{name}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+            ))
+            created.append(name)
+        month = _add_months(month, 1)
+    return created
+
+
+async def drop_expired_partitions(conn: AsyncConnection, table: str, cutoff: date) -> List[str]:
+    """
+    全期間がcutoffより前の月パーティションを削除する
+
+    Returns:
+        List[str]: 削除したパーティション名
+    """
+    dropped = []
+    for name, month in sorted((await list_partitions(conn, table)).items(), key=lambda item: item[1]):
+        if _add_months(month, 1) <= cutoff:
+            await conn.execute(text(f'DROP TABLE "{name}"'))
+            dropped.append(name)
+    return dropped
+
+
+async def convert_to_partitioned(engine: AsyncEngine, table: str) -> bool:
+    """
+    既存テーブルを月単位のレンジパーティションテーブルに変換する（PostgreSQLのみ）
+
+    パーティションキーを含めるため主キーは (id, キー) になる。
+    データを全件コピーするため、メンテナンス時間に実行すること
+
+    Args:
+        engine: 書き込み用エンジン
+        table: 対象テーブル（PARTITIONED_TABLESのいずれか）
+
+    Returns:
+        bool: 変換した場合True（変換済み・PostgreSQL以外はFalse）
+    """
+    key = PARTITIONED_TABLES[table]
+    old_table = f"{table}_unpartitioned"
+    sequence = f"{table}_id_seq"
+
+    async with engine.begin() as conn:
+        if conn.dialect.name != "postgresql" or await is_partitioned(conn, table):
+            return False
+
+        first_value = (await conn.execute(text(f'SELECT min("{key}") FROM "{table}"'))).scalar()
+        first_month = (first_value.date() if isinstance(first_value, datetime) else first_value) or date.today()
+        indexes = models.Base.metadata.tables[table].indexes
+
+        await conn.execute(text(f'ALTER TABLE "{table}" RENAME TO "{old_table}"'))
+        for index in indexes:
+            await conn.execute(text(f'DROP INDEX IF EXISTS "{index.name}"'))
+        # 旧テーブル削除時にIDのシーケンスが消えないよう所有を外す
+        await conn.execute(text(f'ALTER SEQUENCE "{sequence}" OWNED BY NONE'))
+
+        await conn.execute(text(
+            f'CREATE TABLE "{table}" (LIKE "{old_table}" INCLUDING DEFAULTS) '
+            f'PARTITION BY RANGE ("{key}")'
+        ))
+        await conn.execute(text(f'ALTER TABLE "{table}" ADD PRIMARY KEY (id, "{key}")'))
+        for column in models.Base.metadata.tables[table].columns:
+            for foreign_key in column.foreign_keys:
+                await conn.execute(text(
+                    f'ALTER TABLE "{table}" ADD FOREIGN KEY ("{column.name}") '
+                    f'REFERENCES "{foreign_key.column.table.name}" ("{foreign_key.column.name}")'
+                ))
+        for index in indexes:
+            await conn.execute(CreateIndex(index))
+
+        created = await ensure_partitions(conn, table, first_month)
+        await conn.execute(text(f'INSERT INTO "{table}" SELECT * FROM "{old_table}"'))
+        await conn.execute(text(f'DROP TABLE "{old_table}"'))
+        await conn.execute(text(f'ALTER SEQUENCE "{sequence}" OWNED BY "{table}".id'))
+
+    logger.info(f"Converted {table} to {len(created)} monthly partitions")
+    return True
+
+
+async def apply_retention(session_factory: Optional[async_sessionmaker] = None,
+                          today: Optional[date] = None) -> Dict[str, int]:
+    """
+    保持期間を過ぎたシフトとスクレイピングログを削除する
+
+    シフトは勤務日（date）、ログは開始時刻を基準にする。
+    パーティション化済みのテーブルは期限切れの月パーティションを削除してから、
+    残りの境界月の古い行を上限件数ずつ削除する
+
+    Args:
+        session_factory: 書き込み用セッションファクトリ（省略時はAsyncSessionLocal）
+        today: 基準日（省略時は今日）
+
+    Returns:
+        Dict[str, int]: 削除した行数（shifts, scraping_logs）と削除したパーティション数
+    """
+    if session_factory is None:
+        from .database import AsyncSessionLocal
+        session_factory = AsyncSessionLocal
+
+    today = today or date.today()
+    shift_cutoff = today - timedelta(days=settings.retention_shift_days)
+    log_cutoff = today - timedelta(days=settings.retention_log_days)
+    result = {"shifts": 0, "scraping_logs": 0, "partitions_dropped": 0}
+
+    # パーティションの保守（次月以降の作成と期限切れの削除）
+    async with session_factory() as db:
+        conn = await db.connection()
+        for table, cutoff in [("shifts", shift_cutoff), ("scraping_logs", log_cutoff)]:
+            if await is_partitioned(conn, table):
+                await ensure_partitions(conn, table, today)
+                result["partitions_dropped"] += len(await drop_expired_partitions(conn, table, cutoff))
+        await db.commit()
+
+    result["shifts"] = await delete_in_batches(
+        session_factory, models.Shift, models.Shift.date < shift_cutoff
+    )
+    result["scraping_logs"] = await delete_in_batches(
+        session_factory, models.ScrapingLog,
+        models.ScrapingLog.started_at < datetime.combine(log_cutoff, datetime.min.time())
+    )
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Data retention maintenance")
+    parser.add_argument("--partition", action="store_true",
+                        help="shifts / scraping_logs を月パーティションに変換（PostgreSQLのみ）")
+    args = parser.parse_args()
+
+    async def main():
+        from .database import async_engine
+        if args.partition:
+            for table in PARTITIONED_TABLES:
+                converted = await convert_to_partitioned(async_engine, table)
+                print(f"{table}: {'converted' if converted else 'skipped'}")
+        print(await apply_retention())
+        await async_engine.dispose()
+
+    asyncio.run(main())
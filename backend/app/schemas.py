@@ -3,9 +3,9 @@ Pydanticスキーマ定義
 APIリクエスト・レスポンスの型定義を管理する
 """
 
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, field_validator
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 
 
 class StoreBase(BaseModel):
@@ -49,6 +49,12 @@ class ShiftBase(BaseModel):
     date: str = Field(..., description="勤務日 (YYYY-MM-DD)")
     start_time: str = Field(..., description="開始時刻 (HH:MM)")
     end_time: str = Field(..., description="終了時刻 (HH:MM)")
+    
+    @field_validator("date", mode="before")
+    @classmethod
+    def _format_date(cls, value):
+        """DBのdate型は従来どおり "YYYY-MM-DD" 文字列で返す"""
+        return value.isoformat() if isinstance(value, date) else value
 
 
 class ShiftResponse(ShiftBase):
@@ -4,7 +4,6 @@ Playwrightを使用したWebスクレイピングの共通機能を提供する
 """
 
 import asyncio
-import json
 import logging
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional, Tuple
@@ -14,8 +13,14 @@ import yaml
 import hashlib
 from pathlib import Path
 
-from ..database import get_db, get_redis
-from ..crud import StoreRepository, GirlRepository, ShiftRepository, AdminRepository
+from ..cache import (
+    cache_get, encode, namespaced_key, queue_generation_bump, GIRLS, SHIFTS, STORES,
+    STORE_SHIFTS,
+)
+from ..database import AsyncSessionLocal, get_redis
+from ..crud import (
+    StoreRepository, GirlRepository, ShiftRepository, RollupRepository, AdminRepository,
+)
 from ..config import settings
 from .image_uploader import ImageUploader
 
@@ -85,21 +90,22 @@ class ConCafeScraper:
         start_time = datetime.utcnow()
         
         # スクレイピングログ開始
-        with next(get_db()) as db:
-            log = AdminRepository.create_scraping_log(db, store_id, "running")
+        async with AsyncSessionLocal() as db:
+            log = await AdminRepository.create_scraping_log(db, store_id, "running")
         
         try:
             result = await self._scrape_store(browser, store_config)
             
             # 成功時のログ更新
-            with next(get_db()) as db:
+            async with AsyncSessionLocal() as db:
+                db.add(log)
                 execution_time = int((datetime.utcnow() - start_time).total_seconds() * 1000)
                 log.status = "success"
                 log.girls_found = result["girls_found"]
                 log.shifts_found = result["shifts_found"]
                 log.execution_time = execution_time
                 log.completed_at = datetime.utcnow()
-                db.commit()
+                await db.commit()
             
             return result
             
@@ -107,13 +113,14 @@ class ConCafeScraper:
             logger.error(f"Error scraping store {store_id}: {str(e)}")
             
             # 失敗時のログ更新
-            with next(get_db()) as db:
+            async with AsyncSessionLocal() as db:
+                db.add(log)
                 execution_time = int((datetime.utcnow() - start_time).total_seconds() * 1000)
                 log.status = "failed"
                 log.error_message = str(e)
                 log.execution_time = execution_time
                 log.completed_at = datetime.utcnow()
-                db.commit()
+                await db.commit()
             
             # キャッシュからデータを取得して返す
             return await self._get_cached_data_or_empty(store_id)
@@ -126,8 +133,8 @@ class ConCafeScraper:
         logger.info(f"Starting scrape for {store_name} ({store_id})")
         
         # DBに店舗情報を保存/更新
-        with next(get_db()) as db:
-            StoreRepository.create_or_update(db, store_config)
+        async with AsyncSessionLocal() as db:
+            await StoreRepository.create_or_update(db, store_config)
         
         # ページアクセス
         page = await browser.new_page()
@@ -156,14 +163,17 @@ class ConCafeScraper:
             store_id, girls_data, shifts_data
         )
         
-        # キャッシュに保存
-        cache_key = f"store_shifts:{store_id}"
+        # キャッシュに保存し、コミット済みデータの世代を進めてETagを無効化（1往復）
+        cache_key = await namespaced_key(self.redis, STORE_SHIFTS, store_id)
         cache_data = {
             "girls": girls_data,
             "shifts": shifts_data,
             "scraped_at": datetime.utcnow().isoformat()
         }
-        self.redis.setex(cache_key, settings.cache_ttl, json.dumps(cache_data))
+        pipe = self.redis.pipeline()
+        pipe.setex(cache_key, settings.cache_ttl, encode(cache_data))
+        queue_generation_bump(pipe, STORES, GIRLS, SHIFTS)
+        await pipe.execute()
         
         return {
             "store_id": store_id,
@@ -281,11 +291,23 @@ class ConCafeScraper:
         girls_found = 0
         shifts_found = 0
         
-        with next(get_db()) as db:
+        # 画像のアップロード処理（書き込み接続を占有しないようDBセッションの外で行う）
+        image_urls = {}
+        for girl_data in girls_data:
+            girl_name = girl_data["name"]
+            image_url = girl_data.get("image_url")
+            if image_url:
+                try:
+                    image_url = await self.image_uploader.upload_image(
+                        image_url, f"{store_id}_{girl_name}"
+                    )
+                except Exception as e:
+                    logger.warning(f"Failed to upload image for {girl_name}: {e}")
+            image_urls[girl_name] = image_url
+        
+        async with AsyncSessionLocal() as db:
             # 既存の嬢リストを取得（LEFT判定用）
-            existing_girls = db.query(models.Girl).filter(
-                models.Girl.store_id == store_id
-            ).all()
+            existing_girls = await GirlRepository.get_by_store(db, store_id)
             
             current_girl_names = set()
             
@@ -294,47 +316,41 @@ class ConCafeScraper:
                 girl_name = girl_data["name"]
                 current_girl_names.add(girl_name)
                 
-                # 画像のアップロード処理
-                image_url = girl_data.get("image_url")
-                if image_url:
-                    try:
-                        image_url = await self.image_uploader.upload_image(
-                            image_url, f"{store_id}_{girl_name}"
-                        )
-                    except Exception as e:
-                        logger.warning(f"Failed to upload image for {girl_name}: {e}")
-                
-                girl = GirlRepository.create_or_update(
-                    db, store_id, girl_name, image_url
+                girl = await GirlRepository.create_or_update(
+                    db, store_id, girl_name, image_urls.get(girl_name)
                 )
                 girls_found += 1
             
             # 前回いたが今回いない嬢をLEFTに設定
-            GirlRepository.mark_as_left(db, existing_girls, list(current_girl_names))
+            await GirlRepository.mark_as_left(db, existing_girls, list(current_girl_names))
             
             # シフトデータを保存
+            saved_shifts = set()
             for shift_data in shifts_data:
-                girl = GirlRepository.get_by_store_and_name(
+                girl = await GirlRepository.get_by_store_and_name(
                     db, store_id, shift_data["girl_name"]
                 )
                 
                 if girl:
-                    ShiftRepository.create_or_update(
+                    shift = await ShiftRepository.create_or_update(
                         db, store_id, girl.id, shift_data["date"],
                         shift_data["start_time"], shift_data["end_time"],
                         shift_data.get("shift_type", "regular")
                     )
+                    saved_shifts.add((shift.girl_id, shift.date))
                     shifts_found += 1
+            
+            # 保存した嬢・日付の日次／月次集計を更新
+            await RollupRepository.refresh(db, store_id, saved_shifts)
         
         return girls_found, shifts_found
     
     async def _get_cached_data_or_empty(self, store_id: str) -> Dict[str, Any]:
         """キャッシュからデータを取得、なければ空のデータを返す"""
-        cache_key = f"store_shifts:{store_id}"
-        cached_data = self.redis.get(cache_key)
+        cache_key = await namespaced_key(self.redis, STORE_SHIFTS, store_id)
+        data = await cache_get(self.redis, cache_key)
         
-        if cached_data:
-            data = json.loads(cached_data)
+        if data is not None:
             return {
                 "store_id": store_id,
                 "status": "cached",
@@ -76,7 +76,7 @@ class ScrapingScheduler:
             
             # Redis に最新実行結果を保存
             from ..database import get_redis
-            import json
+            from ..cache import cache_set, namespaced_key, SCRAPING
             redis_client = get_redis()
             
             summary = {
@@ -88,7 +88,8 @@ class ScrapingScheduler:
                 "total_shifts": results['total_shifts']
             }
             
-            redis_client.setex("scraping:last_execution", 3600, json.dumps(summary))
+            cache_key = await namespaced_key(redis_client, SCRAPING, "last_execution")
+            await cache_set(redis_client, cache_key, 3600, summary)
             
         except Exception as e:
             logger.error(f"Error in scheduled scraping: {e}", exc_info=True)
@@ -98,39 +99,18 @@ class ScrapingScheduler:
         try:
             logger.info("Starting daily cleanup...")
             
-            from ..database import get_db
-            from ..models import ScrapingLog, Shift
-            from datetime import timedelta
+            from ..retention import apply_retention
             
-            # 30日以前のスクレイピングログを削除
-            cutoff_date = datetime.utcnow() - timedelta(days=30)
+            # 勤務日が保持期間を過ぎたシフトと古いスクレイピングログを分割削除
+            # （パーティション化済みのテーブルは月パーティションごと削除）
+            result = await apply_retention()
+            
+            logger.info(
+                f"Daily cleanup completed. "
+                f"Deleted {result['scraping_logs']} old logs and {result['shifts']} old shifts "
+                f"({result['partitions_dropped']} partitions dropped)."
+            )
             
-            with next(get_db()) as db:
-                old_logs_count = db.query(ScrapingLog).filter(
-                    ScrapingLog.started_at < cutoff_date
-                ).count()
-                
-                db.query(ScrapingLog).filter(
-                    ScrapingLog.started_at < cutoff_date
-                ).delete()
-                
-                # 90日以前のシフトデータを削除
-                old_shift_cutoff = datetime.utcnow() - timedelta(days=90)
-                old_shifts_count = db.query(Shift).filter(
-                    Shift.scraped_at < old_shift_cutoff
-                ).count()
-                
-                db.query(Shift).filter(
-                    Shift.scraped_at < old_shift_cutoff
-                ).delete()
-                
-                db.commit()
-                
-                logger.info(
-                    f"Daily cleanup completed. "
-                    f"Deleted {old_logs_count} old logs and {old_shifts_count} old shifts."
-                )
-                
         except Exception as e:
             logger.error(f"Error in daily cleanup: {e}", exc_info=True)
     
@@ -139,12 +119,12 @@ class ScrapingScheduler:
         try:
             logger.info("Starting weekly stats update...")
             
-            from ..database import get_db, get_redis
+            from ..database import AsyncSessionLocal, get_redis
             from ..crud import AdminRepository
-            import json
+            from ..cache import cache_set
             
-            with next(get_db()) as db:
-                stats = AdminRepository.get_stats(db)
+            async with AsyncSessionLocal() as db:
+                stats = await AdminRepository.get_stats(db)
                 
                 # Redis に統計情報を保存
                 redis_client = get_redis()
@@ -153,7 +133,7 @@ class ScrapingScheduler:
                     "stats": stats
                 }
                 
-                redis_client.setex("stats:weekly", 604800, json.dumps(weekly_stats))  # 1週間保持
+                await cache_set(redis_client, "stats:weekly", 604800, weekly_stats)  # 1週間保持
                 
                 logger.info(f"Weekly stats updated: {stats}")
                 
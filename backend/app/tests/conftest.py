@@ -6,25 +6,38 @@ pytestの設定とフィクスチャ定義
 import pytest
 import asyncio
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from unittest.mock import AsyncMock, Mock
 import tempfile
 import os
+import httpx
+from redis import asyncio as aioredis
 
 from ..main import app
-from ..database import get_db, Base
+from .. import database
+from ..cache import EmbeddedCache
+from ..cache import namespaces as cache_namespaces
+from ..database import get_async_db, get_db, Base
 from ..models import Store, Girl, Shift
 from ..scraper.base import ConCafeScraper
 
 
-# テスト用データベース設定
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+# テスト用データベース設定（リポジトリ内にファイルを残さないよう一時ディレクトリに作成）
+TEST_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="concafe-test-"), "test.db")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{TEST_DB_PATH}"
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# API（非同期セッション）用の同じテスト用データベース
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{TEST_DB_PATH}")
+TestingAsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
 
 @pytest.fixture(scope="session")
 def event_loop():
@@ -47,6 +60,50 @@ def db_session():
         Base.metadata.drop_all(bind=engine)
 
 
+class QueryCounter:
+    """
+    ブロック内で発行されたSQL文を数えるコンテキストマネージャ
+    N+1クエリの再発をテストで検出するために使う
+    """
+    
+    def __init__(self, bind):
+        self.bind = bind
+        self.statements = []
+    
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+    
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+    
+    def __enter__(self):
+        event.listen(self.bind, "before_cursor_execute", self._record)
+        return self
+    
+    def __exit__(self, *exc_info):
+        event.remove(self.bind, "before_cursor_execute", self._record)
+
+
+@pytest.fixture
+async def async_db_session(db_session):
+    """テスト用の非同期データベースセッション（テーブルはdb_sessionが作成）"""
+    async with TestingAsyncSessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def async_session_factory(db_session):
+    """テスト用DBの非同期セッションファクトリ（AsyncSessionLocalの差し替え用）"""
+    return TestingAsyncSessionLocal
+
+
+@pytest.fixture
+def count_queries():
+    """APIからテスト用DBへのクエリ数を数える（with count_queries() as counter: ...）"""
+    return lambda: QueryCounter(async_engine.sync_engine)
+
+
 @pytest.fixture
 def client(db_session):
     """FastAPIテストクライアント"""
@@ -64,6 +121,52 @@ def client(db_session):
     app.dependency_overrides.clear()
 
 
+@pytest.fixture(params=["embedded", "embedded-sqlite", "redis"])
+async def cache_backend(request, tmp_path):
+    """
+    キャッシュバックエンド
+    同じテストを組み込み（メモリ / SQLiteファイル）とRedisの各バックエンドで実行する
+    Redisは TEST_REDIS_URL（既定: DB 15）に接続できない場合スキップする
+    """
+    if request.param == "embedded":
+        backend = EmbeddedCache()
+    elif request.param == "embedded-sqlite":
+        backend = EmbeddedCache(str(tmp_path / "cache.sqlite3"))
+    else:
+        backend = aioredis.from_url(os.environ.get("TEST_REDIS_URL", "redis://localhost:6379/15"))
+        try:
+            await backend.ping()
+        except Exception:
+            pytest.skip("Redis is not available")
+        await backend.flushdb()
+    # バージョン番号のワーカー内メモをバックエンドごとにリセット
+    cache_namespaces._version_memo.clear()
+    
+    yield backend
+    
+    if request.param == "redis":
+        await backend.flushdb()
+    await backend.aclose()
+
+
+@pytest.fixture
+async def api_client(async_db_session, cache_backend, monkeypatch):
+    """
+    非同期APIクライアント
+    ライフサイクル（スケジューラー起動）を通さず、テスト用DBとキャッシュで実行する
+    """
+    async def override_get_async_db():
+        yield async_db_session
+    
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    monkeypatch.setattr(database, "redis_client", cache_backend)
+    
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        yield client
+    
+    app.dependency_overrides.clear()
+
+
 @pytest.fixture
 def sample_store_data():
     """サンプル店舗データ"""
@@ -105,12 +208,18 @@ def sample_shift_data():
 
 @pytest.fixture
 def mock_redis():
-    """Redisモック"""
-    mock = Mock()
+    """Redisモック（redis.asyncio互換）"""
+    mock = AsyncMock()
     mock.get.return_value = None
     mock.setex.return_value = True
     mock.delete.return_value = 1
     mock.keys.return_value = []
+    mock.hget.return_value = None
+    
+    # パイプラインへのコマンド追加は同期、executeのみ非同期
+    pipe = Mock()
+    pipe.execute = AsyncMock(return_value=[])
+    mock.pipeline = Mock(return_value=pipe)
     return mock
 
 
@@ -167,6 +276,24 @@ def populated_db(db_session, sample_store_data, sample_girl_data, sample_shift_d
     }
 
 
+@pytest.fixture
+def busy_day_db(db_session, sample_store_data):
+    """複数店舗・多数の嬢が出勤する日のデータ（N+1検出用）"""
+    for store_index in range(3):
+        store = Store(**{**sample_store_data, "id": f"store-{store_index}",
+                         "name": f"テスト店舗{store_index}"})
+        db_session.add(store)
+        for girl_index in range(10):
+            girl = Girl(store_id=store.id, name=f"嬢{store_index}-{girl_index}",
+                        image_url=f"https://example.com/{store_index}/{girl_index}.jpg")
+            db_session.add(girl)
+            db_session.flush()
+            db_session.add(Shift(store_id=store.id, girl_id=girl.id, date="2024-01-15",
+                                 start_time=f"{11 + girl_index % 8}:00", end_time="22:00"))
+    db_session.commit()
+    return db_session
+
+
 @pytest.fixture
 def mock_scraper():
     """スクレイパーモック"""
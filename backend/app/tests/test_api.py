@@ -0,0 +1,183 @@
+"""
+APIエンドポイントのテスト
+テスト用DBとキャッシュバックエンドを使って主要な読み取りAPIを検証する
+"""
+
+from datetime import datetime
+
+from ..cache import bump_generation, STORES
+from ..config import settings
+from ..models import ScrapingLog
+
+
+class TestConditionalGet:
+    """条件付きGET（ETag / 304）のテスト"""
+
+    async def test_stores_etag_roundtrip(self, api_client, cache_backend, populated_db):
+        """同じETagなら304、データ更新後は200を返すこと"""
+        response = await api_client.get("/api/v1/stores/")
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        assert "max-age=" in response.headers["cache-control"]
+        assert response.headers["last-modified"]
+
+        not_modified = await api_client.get("/api/v1/stores/", headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+
+        await bump_generation(cache_backend, STORES)
+
+        refreshed = await api_client.get("/api/v1/stores/", headers={"If-None-Match": etag})
+        assert refreshed.status_code == 200
+        assert refreshed.headers["etag"] != etag
+
+    async def test_shifts_cached_response(self, api_client, populated_db):
+        """日別シフトはキャッシュ済みでも同じ内容とETagを返すこと"""
+        first = await api_client.get("/api/v1/shifts/", params={"date": "2024-01-15"})
+        second = await api_client.get("/api/v1/shifts/", params={"date": "2024-01-15"})
+
+        assert first.status_code == 200
+        assert first.json() == second.json()
+        assert first.json()["total_girls"] == 1
+        # 型付きカラムでも日付・時刻は文字列で返す
+        shift = first.json()["stores"][0]["shifts"][0]
+        assert (shift["date"], shift["start_time"], shift["end_time"]) == ("2024-01-15", "18:00", "22:00")
+        assert first.headers["etag"] == second.headers["etag"]
+
+    async def test_girl_detail(self, api_client, populated_db):
+        """嬢詳細の取得とキャッシュ後の再取得"""
+        girl_id = populated_db["girl"].id
+
+        first = await api_client.get(f"/api/v1/girls/{girl_id}")
+        second = await api_client.get(f"/api/v1/girls/{girl_id}")
+
+        assert first.status_code == 200
+        assert first.json()["name"] == "テスト嬢"
+        assert second.json()["work_days_count"] == first.json()["work_days_count"]
+
+    async def test_girl_not_found(self, api_client, db_session):
+        """存在しない嬢は404"""
+        response = await api_client.get("/api/v1/girls/999")
+        assert response.status_code == 404
+
+    async def test_clear_cache_invalidates_namespace(self, api_client, populated_db):
+        """DELETE /admin/cache で名前空間のバージョンが進み、削除ジョブが開始されること"""
+        auth = (settings.admin_username, settings.admin_password)
+        await api_client.get("/api/v1/shifts/", params={"date": "2024-01-15"})
+
+        response = await api_client.delete(
+            "/api/v1/admin/cache", params={"namespaces": "shifts_by_date"}, auth=auth
+        )
+        assert response.status_code == 200
+        assert response.json()["versions"] == {"shifts_by_date": 1}
+
+        bad = await api_client.delete(
+            "/api/v1/admin/cache", params={"namespaces": "unknown"}, auth=auth
+        )
+        assert bad.status_code == 400
+
+
+class TestQueryCount:
+    """シフト系・管理画面エンドポイントのクエリ数のテスト（件数に比例して増えないこと）"""
+
+    async def test_shifts_by_date(self, api_client, busy_day_db, count_queries):
+        """日別シフトは嬢・店舗名を含めて2クエリ"""
+        with count_queries() as counter:
+            response = await api_client.get("/api/v1/shifts/", params={"date": "2024-01-15"})
+
+        assert response.status_code == 200
+        assert response.json()["total_girls"] == 30
+        assert len(response.json()["stores"]) == 3
+        assert counter.count == 2
+
+    async def test_store_shifts(self, api_client, busy_day_db, count_queries):
+        """店舗別シフトは店舗とシフト＋嬢の2クエリ"""
+        with count_queries() as counter:
+            response = await api_client.get(
+                "/api/v1/shifts/store-0", params={"start_date": "2024-01-15", "days": 1}
+            )
+
+        assert response.status_code == 200
+        assert len(response.json()["shifts"]) == 10
+        assert response.json()["shifts"][0]["girl_name"].startswith("嬢0-")
+        assert counter.count == 2
+
+    async def test_search_shifts(self, api_client, busy_day_db, count_queries):
+        """シフト検索は1クエリ"""
+        with count_queries() as counter:
+            response = await api_client.get("/api/v1/shifts/search/", params={"store_name": "店舗"})
+
+        assert response.status_code == 200
+        assert len(response.json()) == 30
+        assert all(item["girl_image_url"] for item in response.json())
+        assert counter.count == 1
+
+    async def test_admin_stats_and_logs(self, api_client, db_session, busy_day_db, count_queries):
+        """管理画面の統計は2クエリ、ログ一覧は店舗名を含めて1クエリ"""
+        for store_index in range(3):
+            for minute, status in enumerate(["failed", "success"]):
+                db_session.add(ScrapingLog(store_id=f"store-{store_index}", status=status,
+                                           started_at=datetime(2024, 1, 15, 12, minute)))
+        db_session.commit()
+        auth = (settings.admin_username, settings.admin_password)
+
+        with count_queries() as counter:
+            stats = await api_client.get("/api/v1/admin/stats", auth=auth)
+        assert stats.status_code == 200
+        assert stats.json()["total_stores"] == 3
+        assert {item["store_name"] for item in stats.json()["scraping_status"]} == {
+            "テスト店舗0", "テスト店舗1", "テスト店舗2"
+        }
+        assert all(item["status"] == "success" for item in stats.json()["scraping_status"])
+        assert counter.count == 2
+
+        with count_queries() as counter:
+            logs = await api_client.get("/api/v1/admin/logs", auth=auth)
+        assert logs.status_code == 200
+        assert len(logs.json()) == 6
+        assert logs.json()[0]["store_name"].startswith("テスト店舗")
+        assert counter.count == 1
+
+
+class TestCursorPagination:
+    """カーソル（キーセット）ページネーションのテスト"""
+
+    async def _walk(self, api_client, path, params):
+        pages, cursor = [], None
+        while True:
+            response = await api_client.get(path, params={**params, **({"cursor": cursor} if cursor else {})})
+            assert response.status_code == 200
+            pages.append(response.json())
+            cursor = response.headers.get("x-next-cursor")
+            if not cursor:
+                return pages
+
+    async def test_girls_pages(self, api_client, busy_day_db):
+        """カーソルで全件を重複なく辿れ、OFFSET指定と同じ並びになること"""
+        pages = await self._walk(api_client, "/api/v1/girls/", {"limit": 7})
+        ids = [girl["id"] for page in pages for girl in page]
+
+        assert [len(page) for page in pages] == [7, 7, 7, 7, 2]
+        assert len(set(ids)) == 30
+
+        legacy = await api_client.get("/api/v1/girls/", params={"limit": 7, "offset": 7})
+        assert [girl["id"] for girl in legacy.json()] == ids[7:14]
+
+    async def test_search_pages(self, api_client, busy_day_db):
+        """嬢検索・シフト検索もカーソルで全件を辿れること"""
+        girl_pages = await self._walk(api_client, "/api/v1/girls/search/", {"name": "嬢", "limit": 8})
+        shift_pages = await self._walk(api_client, "/api/v1/shifts/search/", {"limit": 8})
+        shifts = [shift for page in shift_pages for shift in page]
+
+        assert len({girl["id"] for page in girl_pages for girl in page}) == 30
+        assert len({shift["id"] for shift in shifts}) == 30
+        starts = [shift["start_time"] for shift in shifts]
+        assert starts == sorted(starts)
+
+    async def test_invalid_cursor(self, api_client, busy_day_db):
+        """不正なカーソルやoffsetとの併用は400"""
+        assert (await api_client.get("/api/v1/girls/", params={"cursor": "broken"})).status_code == 400
+        assert (await api_client.get("/api/v1/shifts/search/", params={"cursor": "e30"})).status_code == 400
+        response = await api_client.get("/api/v1/girls/", params={"cursor": "W10", "offset": 1})
+        assert response.status_code == 400
+
@@ -0,0 +1,219 @@
+"""
+キャッシュ層のテスト
+値のエンコード、メモリ計測、世代カウンタに基づく条件付きGETをテストする
+"""
+
+import json
+import pytest
+from datetime import datetime
+from email.utils import formatdate
+from unittest.mock import AsyncMock, Mock, patch
+from starlette.requests import Request
+
+from ..cache import (
+    CacheDecodeError, bump_generation, cache_get, cache_set, decode, encode,
+    get_generations, load_validator, namespace_stats, GIRLS, SHIFTS,
+)
+from ..cache import codec
+
+
+def make_request(path="/api/v1/shifts/", query=b"date=2024-01-15", headers=None):
+    """テスト用リクエストを生成"""
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": query,
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    })
+
+
+def redis_with_generations(*generations, cached=None):
+    """世代情報（とキャッシュ値）を返すRedisモック"""
+    results = []
+    for value, updated_at in generations:
+        results.extend([False, [value, updated_at]])
+    if cached is not None:
+        results.append(cached)
+
+    mock = Mock()
+    mock.pipeline.return_value.execute = AsyncMock(side_effect=lambda: list(results))
+    return mock
+
+
+async def make_validator(redis_client, request, namespaces, *variants):
+    """検証子を生成"""
+    validator, _ = await load_validator(redis_client, request, namespaces, *variants)
+    return validator
+
+
+class TestGenerations:
+    """世代カウンタのテスト"""
+
+    async def test_get_generations(self):
+        """世代番号と更新時刻の取得テスト"""
+        redis_client = redis_with_generations((b"3", b"1700000000.5"), (None, None))
+
+        generations = await get_generations(redis_client, [SHIFTS, GIRLS])
+
+        assert generations[SHIFTS] == (3, 1700000000.5)
+        assert generations[GIRLS][0] == 0
+        pipe = redis_client.pipeline.return_value
+        assert pipe.hsetnx.call_count == 2
+
+    async def test_bump_generation(self, mock_redis):
+        """世代番号の更新テスト"""
+        await bump_generation(mock_redis, SHIFTS, GIRLS)
+
+        pipe = mock_redis.pipeline.return_value
+        pipe.hincrby.assert_any_call("generation:shifts", "value", 1)
+        pipe.hincrby.assert_any_call("generation:girls", "value", 1)
+        pipe.execute.assert_awaited_once()
+
+
+class TestCacheValidator:
+    """条件付きGET判定のテスト"""
+
+    async def test_etag_changes_with_generation(self):
+        """世代が進むとETagが変わること"""
+        request = make_request()
+        before = await make_validator(redis_with_generations(("1", "1700000000")), request, [SHIFTS])
+        after = await make_validator(redis_with_generations(("2", "1700000000")), request, [SHIFTS])
+
+        assert before.etag != after.etag
+        assert before.etag.startswith('"') and before.etag.endswith('"')
+
+    async def test_etag_depends_on_query(self):
+        """クエリが異なればETagも異なること"""
+        redis_client = redis_with_generations(("1", "1700000000"))
+        a = await make_validator(redis_client, make_request(query=b"date=2024-01-15"), [SHIFTS])
+        b = await make_validator(redis_client, make_request(query=b"date=2024-01-16"), [SHIFTS])
+
+        assert a.etag != b.etag
+
+    async def test_if_none_match(self):
+        """If-None-Matchが一致すれば304になること"""
+        redis_client = redis_with_generations(("5", "1700000000"))
+        etag = (await make_validator(redis_client, make_request(), [SHIFTS])).etag
+
+        validator = await make_validator(
+            redis_client, make_request(headers={"If-None-Match": f'W/"x", {etag}'}), [SHIFTS]
+        )
+        assert validator.is_not_modified()
+
+        response = validator.not_modified_response()
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert "max-age=" in response.headers["cache-control"]
+
+        stale = await make_validator(
+            redis_client, make_request(headers={"If-None-Match": '"stale"'}), [SHIFTS]
+        )
+        assert not stale.is_not_modified()
+
+    @pytest.mark.parametrize("offset, expected", [(0, True), (10, True), (-10, False)])
+    async def test_if_modified_since(self, offset, expected):
+        """If-Modified-Sinceによる判定"""
+        redis_client = redis_with_generations(("1", "1700000000"))
+        since = formatdate(1700000000 + offset, usegmt=True)
+
+        validator = await make_validator(
+            redis_client, make_request(headers={"If-Modified-Since": since}), [SHIFTS]
+        )
+        assert validator.is_not_modified() is expected
+
+    async def test_cached_value_in_same_roundtrip(self):
+        """キャッシュ値を世代情報と同じパイプラインで取得すること"""
+        redis_client = redis_with_generations(("1", "1700000000"), cached=encode({"date": "2024-01-15"}))
+
+        validator, cached = await load_validator(
+            redis_client, make_request(), [SHIFTS], cache_key="shifts_by_date:2024-01-15:all"
+        )
+
+        assert cached == {"date": "2024-01-15"}
+        assert validator.etag
+        redis_client.pipeline.return_value.get.assert_called_once_with("shifts_by_date:2024-01-15:all")
+        redis_client.pipeline.return_value.execute.assert_awaited_once()
+
+
+class TestCodec:
+    """キャッシュ値エンコードのテスト"""
+
+    @pytest.fixture
+    def snapshot(self):
+        """店舗シフトのスナップショット（同じ名前・URLが繰り返される）"""
+        return {
+            "girls": [
+                {"name": f"テスト嬢{i % 5}", "image_url": f"https://example.com/{i % 5}.jpg"}
+                for i in range(40)
+            ],
+            "scraped_at": datetime(2024, 1, 15, 18, 0),
+        }
+
+    @pytest.mark.parametrize("codec_name, compression", [
+        ("msgpack", "zstd"), ("msgpack", "none"), ("json", "zstd"), ("json", "none"),
+    ])
+    def test_roundtrip(self, snapshot, codec_name, compression):
+        """各コーデックでの往復変換"""
+        with patch.object(codec.settings, "cache_codec", codec_name), \
+                patch.object(codec.settings, "cache_compression", compression):
+            raw = encode(snapshot)
+
+        assert raw.startswith(codec.ENVELOPE_MAGIC)
+        restored = decode(raw)
+        assert restored["girls"] == snapshot["girls"]
+        assert restored["scraped_at"] == "2024-01-15T18:00:00"
+
+    def test_compact_encoding_is_smaller(self, snapshot):
+        """msgpack + zstdが旧形式のJSONより小さいこと"""
+        legacy = json.dumps(snapshot, default=str).encode()
+        assert len(encode(snapshot)) < len(legacy) / 2
+
+    def test_legacy_json_is_readable(self):
+        """旧形式（json.dumps文字列）も読めること"""
+        assert decode('{"girls": []}') == {"girls": []}
+        assert decode(b'[1, 2]') == [1, 2]
+
+    def test_unknown_version(self):
+        """未知のエンベロープバージョンは例外"""
+        raw = codec.ENVELOPE_MAGIC + bytes([99, codec.CODEC_JSON, 0]) + b"{}"
+        with pytest.raises(CacheDecodeError):
+            decode(raw)
+
+    async def test_cache_get_discards_broken_entry(self, mock_redis):
+        """復元できない値はキャッシュミス扱い"""
+        mock_redis.get.return_value = codec.ENVELOPE_MAGIC + bytes([1, 1, 1]) + b"broken"
+        assert await cache_get(mock_redis, "girl_detail:1") is None
+
+    async def test_cache_set(self, mock_redis):
+        """TTL付きでエンコード済みの値を保存すること"""
+        await cache_set(mock_redis, "girl_detail:1", 1800, {"id": 1})
+
+        key, ttl, raw = mock_redis.setex.call_args[0]
+        assert (key, ttl) == ("girl_detail:1", 1800)
+        assert decode(raw) == {"id": 1}
+
+
+class TestAccounting:
+    """メモリ計測のテスト"""
+
+    async def test_namespace_stats(self):
+        """名前空間ごとにキー数とバイト数を集計すること"""
+        async def scan_iter(**kwargs):
+            for key in [b"store_shifts:a", b"store_shifts:b", b"girl_detail:1"]:
+                yield key
+
+        redis_client = Mock()
+        redis_client.scan_iter = scan_iter
+        redis_client.pipeline.return_value.execute = AsyncMock(return_value=[
+            100, b"string", codec.ENVELOPE_MAGIC + b"\x01\x01\x01",
+            200, b"string", b"{\"gir",
+            50, b"string", codec.ENVELOPE_MAGIC + b"\x01\x01\x00",
+        ])
+
+        stats = await namespace_stats(redis_client)
+
+        assert stats["total_keys"] == 3
+        assert stats["total_bytes"] == 350
+        assert stats["namespaces"]["store_shifts"] == {"keys": 2, "bytes": 300, "legacy_json": 1}
+        assert stats["namespaces"]["girl_detail"]["keys"] == 1
@@ -0,0 +1,180 @@
+"""
+キャッシュバックエンドのテスト
+Redis互換コマンドとキャッシュ層の動作を組み込み・Redisの各バックエンドで検証する
+"""
+
+import asyncio
+import pytest
+
+from ..cache import (
+    CacheCleanup, EmbeddedCache, bump_generation, cache_get, cache_set, get_cleanup_status,
+    get_generations, invalidate_namespaces, namespace_stats, namespaced_key,
+    GIRL_DETAIL, GIRLS, SHIFTS, STORE_SHIFTS,
+)
+from ..config import settings
+
+
+class TestBackendCommands:
+    """Redis互換コマンドのテスト（全バックエンド共通）"""
+
+    async def test_string_commands(self, cache_backend):
+        """文字列の保存・取得・削除"""
+        assert await cache_backend.get("missing") is None
+
+        await cache_backend.setex("girl_detail:1", 60, b"value")
+        assert await cache_backend.get("girl_detail:1") == b"value"
+        assert await cache_backend.mget(["girl_detail:1", "missing"]) == [b"value", None]
+        assert 0 < await cache_backend.ttl("girl_detail:1") <= 60
+
+        assert await cache_backend.delete("girl_detail:1", "missing") == 1
+        assert await cache_backend.get("girl_detail:1") is None
+
+    async def test_set_nx_and_incr(self, cache_backend):
+        """NX付きSETとカウンタ"""
+        assert await cache_backend.set("lock", "a", nx=True)
+        assert not await cache_backend.set("lock", "b", nx=True)
+        assert await cache_backend.get("lock") == b"a"
+
+        assert await cache_backend.incr("counter") == 1
+        assert await cache_backend.incrby("counter", 5) == 6
+
+    async def test_hash_commands(self, cache_backend):
+        """ハッシュの操作"""
+        assert await cache_backend.hsetnx("h", "a", 1)
+        assert not await cache_backend.hsetnx("h", "a", 2)
+        assert await cache_backend.hincrby("h", "b", 3) == 3
+        assert await cache_backend.hmget("h", "a", "b", "c") == [b"1", b"3", None]
+        assert await cache_backend.type("h") == b"hash"
+
+    async def test_pipeline(self, cache_backend):
+        """パイプラインで複数コマンドをまとめて実行"""
+        pipe = cache_backend.pipeline()
+        pipe.setex("a", 60, b"1")
+        pipe.incr("n")
+        pipe.get("a")
+        assert await pipe.execute() == [True, 1, b"1"]
+
+    async def test_scan_and_memory_usage(self, cache_backend):
+        """キーの走査とメモリ使用量"""
+        await cache_backend.setex("store_shifts:a", 60, b"x" * 100)
+        await cache_backend.setex("girl_detail:1", 60, b"y")
+
+        keys = [key async for key in cache_backend.scan_iter(match="store_shifts:*")]
+        assert keys == [b"store_shifts:a"]
+        assert await cache_backend.memory_usage("store_shifts:a") >= 100
+        assert await cache_backend.getrange("store_shifts:a", 0, 2) == b"xxx"
+
+
+class TestCacheLayer:
+    """キャッシュ層のテスト（全バックエンド共通）"""
+
+    async def test_cache_roundtrip(self, cache_backend):
+        """エンコード付きの保存と取得"""
+        await cache_set(cache_backend, "girl_detail:1", 60, {"id": 1, "name": "テスト嬢"})
+        assert await cache_get(cache_backend, "girl_detail:1") == {"id": 1, "name": "テスト嬢"}
+
+    async def test_generations(self, cache_backend):
+        """世代番号の初期化と更新"""
+        first = await get_generations(cache_backend, [SHIFTS, GIRLS])
+        assert first[SHIFTS][0] == 0
+        # 未初期化時に書き込んだ時刻は次回以降も変わらない
+        assert (await get_generations(cache_backend, [SHIFTS]))[SHIFTS] == first[SHIFTS]
+
+        await bump_generation(cache_backend, SHIFTS)
+
+        second = await get_generations(cache_backend, [SHIFTS, GIRLS])
+        assert second[SHIFTS][0] == 1
+        assert second[GIRLS] == first[GIRLS]
+
+    async def test_namespace_stats(self, cache_backend):
+        """名前空間ごとの集計"""
+        await cache_set(cache_backend, "store_shifts:a", 60, {"girls": []})
+        await cache_set(cache_backend, "store_shifts:b", 60, {"girls": []})
+        await cache_backend.setex("girl_detail:1", 60, '{"id": 1}')
+
+        stats = await namespace_stats(cache_backend)
+
+        assert stats["namespaces"]["store_shifts"]["keys"] == 2
+        assert stats["namespaces"]["store_shifts"]["legacy_json"] == 0
+        assert stats["namespaces"]["girl_detail"]["legacy_json"] == 1
+        assert stats["total_keys"] == 3
+
+
+class TestEmbeddedCache:
+    """組み込みキャッシュ固有のテスト"""
+
+    async def test_expiry(self):
+        """TTL経過後に値が消えること"""
+        cache = EmbeddedCache()
+        await cache.set("a", b"1", px=10)
+        await asyncio.sleep(0.02)
+
+        assert await cache.get("a") is None
+        assert await cache.ttl("a") == -2
+
+    async def test_wrong_type(self):
+        """型の異なるキーへの操作はRedisと同じエラー"""
+        from redis.exceptions import ResponseError
+
+        cache = EmbeddedCache()
+        await cache.hset("h", "a", 1)
+        with pytest.raises(ResponseError):
+            await cache.get("h")
+
+    async def test_sqlite_shared_between_workers(self, tmp_path):
+        """SQLiteファイルを指定すると別インスタンス（ワーカー）間で共有されること"""
+        path = str(tmp_path / "shared.sqlite3")
+        worker_a = EmbeddedCache(path)
+        worker_b = EmbeddedCache(path)
+
+        await bump_generation(worker_a, SHIFTS)
+        await cache_set(worker_a, "girl_detail:1", 60, {"id": 1})
+
+        assert (await get_generations(worker_b, [SHIFTS]))[SHIFTS][0] == 1
+        assert await cache_get(worker_b, "girl_detail:1") == {"id": 1}
+
+        await worker_a.aclose()
+        await worker_b.aclose()
+
+
+class TestNamespaceVersions:
+    """名前空間バージョンと古いキーの削除のテスト（全バックエンド共通）"""
+
+    async def test_invalidate_changes_keys(self, cache_backend):
+        """バージョンを進めると新しいキーになり、旧キャッシュは参照されないこと"""
+        old_key = await namespaced_key(cache_backend, GIRL_DETAIL, 1)
+        assert old_key == "girl_detail:v0:1"
+        await cache_set(cache_backend, old_key, 60, {"id": 1})
+
+        versions = await invalidate_namespaces(cache_backend, [GIRL_DETAIL])
+
+        new_key = await namespaced_key(cache_backend, GIRL_DETAIL, 1)
+        assert versions == {GIRL_DETAIL: 1}
+        assert new_key == "girl_detail:v1:1"
+        assert await cache_get(cache_backend, new_key) is None
+
+    async def test_cleanup_removes_stale_keys(self, cache_backend, monkeypatch):
+        """古いバージョンと旧形式のキーのみ削除し、進捗を記録すること"""
+        monkeypatch.setattr(settings, "cache_cleanup_batch_size", 2)
+        for i in range(3):
+            await cache_backend.setex(f"store_shifts:v0:{i}", 60, b"old")
+        await cache_backend.setex("store_shifts:legacy", 60, b"old")
+        await cache_backend.setex("girl_detail:v0:1", 60, b"other")
+
+        await invalidate_namespaces(cache_backend, [STORE_SHIFTS])
+        current = await namespaced_key(cache_backend, STORE_SHIFTS, "a")
+        await cache_backend.setex(current, 60, b"new")
+
+        cleanup = CacheCleanup(cache_backend)
+        assert cleanup.schedule([STORE_SHIFTS])
+        await cleanup._task
+
+        assert [key async for key in cache_backend.scan_iter(match="store_shifts:*")] == [
+            current.encode()
+        ]
+        assert await cache_backend.get("girl_detail:v0:1") == b"other"
+
+        status = await get_cleanup_status(cache_backend)
+        assert status["status"] == "completed"
+        assert status["deleted"] == 4
+        assert status["scanned"] == 5
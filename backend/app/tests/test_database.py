@@ -0,0 +1,139 @@
+"""
+データベース接続設定のテスト
+SQLiteのチューニングモード（WAL・読み取り専用プール・単一書き込み接続）と
+マイグレーションを検証する
+"""
+
+from datetime import date
+
+import pytest
+from alembic import command
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import OperationalError
+
+from ..database import (
+    BASELINE_REVISION, create_sqlite_engines, get_alembic_config, init_db, to_async_url,
+)
+from ..models import Shift
+
+
+class TestAsyncUrl:
+    """非同期ドライバURLへの変換のテスト"""
+
+    def test_driver_mapping(self):
+        """同期URLは非同期ドライバに置き換え、指定済みのものは変えないこと"""
+        assert to_async_url("sqlite:///./concafe.db") == "sqlite+aiosqlite:///./concafe.db"
+        assert to_async_url("postgresql://u:p@db/concafe") == "postgresql+asyncpg://u:p@db/concafe"
+        assert to_async_url("sqlite+aiosqlite:///x.db") == "sqlite+aiosqlite:///x.db"
+
+
+class TestSQLiteEngines:
+    """SQLiteの書き込み・読み取りエンジンのテスト"""
+
+    @pytest.fixture
+    async def engines(self, tmp_path):
+        writer, reader = create_sqlite_engines(f"sqlite:///{tmp_path / 'tuned.db'}")
+        async with writer.begin() as conn:
+            await conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        yield writer, reader
+        await reader.dispose()
+        await writer.dispose()
+
+    async def test_writer_pragmas(self, engines):
+        """書き込み接続はWAL・synchronous=NORMALで、1接続のみ"""
+        writer, _ = engines
+        async with writer.connect() as conn:
+            assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+            assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 1
+            assert (await conn.execute(text("PRAGMA busy_timeout"))).scalar() == 5000
+        assert writer.pool.size() == 1
+
+    async def test_reader_is_read_only(self, engines):
+        """読み取り接続は書き込みのコミットを参照でき、書き込みは拒否すること"""
+        writer, reader = engines
+        async with writer.begin() as conn:
+            await conn.execute(text("INSERT INTO items (name) VALUES ('a')"))
+
+        async with reader.connect() as conn:
+            assert (await conn.execute(text("SELECT count(*) FROM items"))).scalar() == 1
+            with pytest.raises(OperationalError):
+                await conn.execute(text("INSERT INTO items (name) VALUES ('b')"))
+
+    async def test_memory_database_shares_connection(self):
+        """インメモリDBは書き込み・読み取りで同じエンジンを使うこと"""
+        writer, reader = create_sqlite_engines("sqlite://")
+        assert writer is reader
+        await writer.dispose()
+
+
+class TestMigrations:
+    """Alembicマイグレーションのテスト"""
+
+    def test_typed_shift_columns(self, tmp_path):
+        """文字列の日付・時刻が型付きカラムに変換されること（日付跨ぎ・不正行を含む）"""
+        url = f"sqlite:///{tmp_path / 'legacy.db'}"
+        command.upgrade(get_alembic_config(url), BASELINE_REVISION)
+
+        engine = create_engine(url)
+        with engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO stores (id, name, url, area, open_time, close_time, selectors) "
+                "VALUES ('s', '店舗', 'https://example.com', '秋葉原', '11:00', '22:00', '{}')"
+            ))
+            conn.execute(text("INSERT INTO girls (id, store_id, name) VALUES (1, 's', '嬢')"))
+            conn.execute(text(
+                "INSERT INTO shifts (store_id, girl_id, date, start_time, end_time) VALUES "
+                "('s', 1, '2024-01-15', '18:00', '22:00'), "
+                "('s', 1, '2024-01-16', '20:00', '1:30'), "
+                "('s', 1, 'unknown', '18:00', '22:00')"
+            ))
+            conn.execute(text("DROP TABLE alembic_version"))
+
+        # マイグレーション導入前のDBとして初期化（基準リビジョンをstampしてから適用）
+        init_db(url)
+
+        with engine.connect() as conn:
+            rows = conn.execute(text(
+                "SELECT date, start_minutes, end_minutes FROM shifts ORDER BY date"
+            )).all()
+            indexes = {index["name"] for index in inspect(conn).get_indexes("shifts")}
+            monthly = conn.execute(text(
+                "SELECT shift_count, work_days, total_minutes FROM girl_monthly_stats"
+            )).all()
+        engine.dispose()
+
+        assert rows == [("2024-01-15", 1080, 1320), ("2024-01-16", 1200, 1530)]
+        assert "idx_shifts_store_date_start" in indexes
+        assert "idx_shifts_store_date" not in indexes
+        # 既存のシフトから集計を作成
+        assert monthly == [(2, 2, 570)]
+
+    def test_fresh_database(self, tmp_path):
+        """新規DBはモデルからテーブルを作成し、最新リビジョンを記録すること"""
+        url = f"sqlite:///{tmp_path / 'fresh.db'}"
+        init_db(url)
+
+        engine = create_engine(url)
+        with engine.connect() as conn:
+            version = conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+        engine.dispose()
+
+        assert version == ScriptDirectory.from_config(get_alembic_config(url)).get_current_head()
+
+
+class TestShiftColumns:
+    """シフトの型付きカラムのテスト"""
+
+    def test_overnight_shift(self, db_session, populated_db):
+        """文字列で設定した時刻が分に変換され、日付跨ぎは翌日終了になること"""
+        shift = Shift(
+            store_id=populated_db["store"].id, girl_id=populated_db["girl"].id,
+            date="2024-01-16", start_time="20:00", end_time="01:00",
+        )
+        db_session.add(shift)
+        db_session.commit()
+
+        assert shift.date == date(2024, 1, 16)
+        assert (shift.start_minutes, shift.end_minutes) == (1200, 1500)
+        assert (shift.start_time, shift.end_time) == ("20:00", "01:00")
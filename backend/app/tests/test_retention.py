@@ -0,0 +1,78 @@
+"""
+データ保持期間の管理のテスト
+勤務日基準の分割削除とスクレイピング時の最終確認日時の更新を検証する
+"""
+
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select
+
+from ..crud import ShiftRepository
+from ..models import ScrapingLog, Shift
+from ..retention import _add_months, apply_retention, delete_in_batches, partition_name
+
+
+class TestBatchedRetention:
+    """分割削除のテスト"""
+
+    async def test_deletes_by_shift_date_in_batches(self, db_session, populated_db,
+                                                    async_session_factory):
+        """勤務日が保持期間を過ぎたシフトだけを上限件数ずつ削除すること"""
+        store, girl = populated_db["store"], populated_db["girl"]
+        today = date(2024, 6, 1)
+        for days_ago in [200, 150, 120, 91, 30, 0]:
+            db_session.add(Shift(store_id=store.id, girl_id=girl.id,
+                                 date=today - timedelta(days=days_ago),
+                                 start_time="18:00", end_time="22:00"))
+        db_session.commit()
+
+        deleted = await delete_in_batches(
+            async_session_factory, Shift,
+            Shift.date < today - timedelta(days=90), batch_size=2, pause=0,
+        )
+
+        # populated_dbの2024-01-15のシフトも期限切れ
+        assert deleted == 5
+        db_session.expire_all()
+        remaining = sorted(shift.date for shift in db_session.query(Shift).all())
+        assert remaining == [today - timedelta(days=30), today]
+
+    async def test_apply_retention(self, db_session, populated_db, async_session_factory):
+        """シフトは勤務日、ログは開始日時で保持期間を判定すること"""
+        store = populated_db["store"]
+        today = date(2024, 6, 1)
+        for days_ago in [60, 10]:
+            db_session.add(ScrapingLog(store_id=store.id, status="success",
+                                       started_at=datetime(2024, 6, 1) - timedelta(days=days_ago)))
+        db_session.commit()
+
+        result = await apply_retention(async_session_factory, today=today)
+
+        assert result == {"shifts": 1, "scraping_logs": 1, "partitions_dropped": 0}
+        async with async_session_factory() as db:
+            assert await db.scalar(select(func.count(ScrapingLog.id))) == 1
+
+    async def test_upsert_refreshes_scraped_at(self, db_session, populated_db, async_db_session):
+        """既存シフトの更新時に最終確認日時を更新すること"""
+        shift = populated_db["shift"]
+        stale = datetime(2020, 1, 1)
+        shift.scraped_at = stale
+        db_session.commit()
+
+        updated = await ShiftRepository.create_or_update(
+            async_db_session, shift.store_id, shift.girl_id,
+            shift.date.isoformat(), shift.start_time, "23:00",
+        )
+
+        assert updated.id == shift.id
+        assert updated.scraped_at.replace(tzinfo=None) > stale
+
+
+class TestPartitionNames:
+    """月パーティションの命名のテスト"""
+
+    def test_month_arithmetic(self):
+        """月の加算が年を跨いでも正しいこと"""
+        assert _add_months(date(2024, 11, 1), 2) == date(2025, 1, 1)
+        assert _add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+        assert partition_name("shifts", date(2024, 1, 1)) == "shifts_p202401"
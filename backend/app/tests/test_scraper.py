@@ -8,6 +8,7 @@ import asyncio
 from unittest.mock import AsyncMock, Mock, patch
 from bs4 import BeautifulSoup
 
+from ..crud import AdminRepository, RollupRepository
 from ..scraper.base import ConCafeScraper
 from ..scraper.image_uploader import ImageUploader
 from ..models import Store, Girl, Shift
@@ -117,7 +118,8 @@ class TestConCafeScraper:
         assert end == "23:00"
 
     @pytest.mark.asyncio
-    async def test_save_scraped_data(self, scraper, db_session, sample_store_data):
+    async def test_save_scraped_data(self, scraper, db_session, async_session_factory,
+                                     sample_store_data):
         """スクレイピングデータ保存のテスト"""
         # 店舗を事前に作成
         store = Store(**sample_store_data)
@@ -154,8 +156,7 @@ class TestConCafeScraper:
             }
         ]
         
-        with patch('app.scraper.base.get_db') as mock_get_db:
-            mock_get_db.return_value.__next__.return_value = db_session
+        with patch('app.scraper.base.AsyncSessionLocal', async_session_factory):
             
             with patch.object(scraper.image_uploader, 'upload_image', return_value="uploaded_url"):
                 girls_found, shifts_found = await scraper._save_scraped_data(
@@ -173,6 +174,65 @@ class TestConCafeScraper:
                 shifts = db_session.query(Shift).filter(Shift.store_id == store.id).all()
                 assert len(shifts) == 2
 
+    @pytest.mark.asyncio
+    async def test_save_scraped_data_updates_rollups(self, scraper, db_session,
+                                                     async_session_factory, sample_store_data):
+        """保存したシフトが日次・月次集計に反映され、再保存しても二重計上しないこと"""
+        store = Store(**sample_store_data)
+        db_session.add(store)
+        db_session.commit()
+
+        girls_data = [{"name": "集計嬢"}]
+        shifts_data = [
+            {"girl_name": "集計嬢", "date": "2024-01-15", "start_time": "18:00", "end_time": "22:00"},
+            {"girl_name": "集計嬢", "date": "2024-01-16", "start_time": "11:00", "end_time": "15:30"},
+        ]
+
+        with patch('app.scraper.base.AsyncSessionLocal', async_session_factory):
+            await scraper._save_scraped_data(store.id, girls_data, shifts_data)
+            await scraper._save_scraped_data(store.id, girls_data, shifts_data)
+
+        # 生シフトが保持期間で削除されても集計は残る
+        db_session.query(Shift).delete()
+        db_session.commit()
+
+        girl = db_session.query(Girl).filter(Girl.name == "集計嬢").one()
+        async with async_session_factory() as db:
+            summary = await RollupRepository.get_girl_summary(db, girl.id)
+            total_shifts = await RollupRepository.get_total_shifts(db)
+
+        assert (summary["shift_count"], summary["work_days"], summary["total_minutes"]) == (2, 2, 510)
+        # 2024-01-15は月曜、2024-01-16は火曜
+        assert summary["hour_histogram"][0][18] == 1
+        assert summary["hour_histogram"][1][11] == 1
+        assert total_shifts == 2
+
+    @pytest.mark.asyncio
+    async def test_save_scraped_data_updates_counters(self, scraper, db_session,
+                                                      async_session_factory, sample_store_data):
+        """保存時に管理画面用のカウンターが増減し、統計が1クエリで取れること"""
+        store = Store(**sample_store_data)
+        db_session.add(store)
+        db_session.commit()
+
+        shifts_data = [
+            {"girl_name": "嬢A", "date": "2024-01-15", "start_time": "18:00", "end_time": "22:00"},
+        ]
+
+        with patch('app.scraper.base.AsyncSessionLocal', async_session_factory):
+            await scraper._save_scraped_data(store.id, [{"name": "嬢A"}, {"name": "嬢B"}], shifts_data)
+            # 嬢Bが退店 → 復帰
+            await scraper._save_scraped_data(store.id, [{"name": "嬢A"}], shifts_data)
+            await scraper._save_scraped_data(store.id, [{"name": "嬢A"}, {"name": "嬢B"}], shifts_data)
+
+        async with async_session_factory() as db:
+            stats = await AdminRepository.get_stats(db)
+
+        assert stats == {
+            "total_stores": 1, "total_girls": 2, "total_shifts": 1,
+            "active_girls": 1, "new_girls_today": 2,
+        }
+
     @pytest.mark.asyncio
     async def test_get_cached_data_or_empty(self, scraper, mock_redis):
         """キャッシュデータ取得のテスト"""
@@ -203,9 +263,11 @@ class TestImageUploader:
     """ImageUploaderクラスのテスト"""
 
     @pytest.fixture
-    def uploader(self):
-        """アップローダーインスタンス"""
-        return ImageUploader()
+    def uploader(self, tmp_path):
+        """アップローダーインスタンス（ローカル保存先は一時ディレクトリ）"""
+        uploader = ImageUploader()
+        uploader.local_storage_path = tmp_path
+        return uploader
 
     @pytest.mark.asyncio
     async def test_download_image_success(self, uploader):
@@ -0,0 +1,118 @@
+"""
+Redisキャッシュ経路のレイテンシ計測
+同期クライアント（従来）とasyncioクライアント＋コネクションプールで、
+同時接続時のキャッシュ参照（世代情報 + GET）のp50/p95/p99を比較する
+
+使い方:
+    cd backend
+    python -m benchmarks.redis_latency --redis-url redis://localhost:6379 --concurrency 50 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Callable, List
+
+import redis
+from redis import asyncio as aioredis
+
+from app.cache import encode, load_validator, GIRLS, SHIFTS, STORES
+from app.cache.http import _generation_key
+from starlette.requests import Request
+
+CACHE_KEY = "bench:shifts_by_date:2024-01-15:all"
+NAMESPACES = [SHIFTS, GIRLS, STORES]
+
+
+def make_request() -> Request:
+    """ETag算出用のダミーリクエスト"""
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/v1/shifts/",
+        "query_string": b"date=2024-01-15",
+        "headers": [],
+    })
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """パーセンタイル値（ミリ秒）"""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+    return ordered[index] * 1000
+
+
+async def run_load(handler: Callable, concurrency: int, requests: int) -> dict:
+    """
+    concurrency件ずつ同時にリクエストを発行し、到着からの応答時間を計測する
+
+    同期クライアントはイベントループをブロックするため、同時に到着した
+    リクエストは直列に処理され、後続のリクエストほど待ち時間が伸びる
+    """
+    latencies: List[float] = []
+
+    async def timed(arrived: float):
+        await handler()
+        latencies.append(time.perf_counter() - arrived)
+
+    started = time.perf_counter()
+    for _ in range(max(1, requests // concurrency)):
+        arrived = time.perf_counter()
+        await asyncio.gather(*[timed(arrived) for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "mean": statistics.mean(latencies) * 1000,
+    }
+
+
+async def main(redis_url: str, concurrencies: List[int], requests: int, pool_size: int) -> None:
+    """同時実行数ごとに同期・非同期クライアントを計測して表を出力"""
+    sync_client = redis.from_url(redis_url)
+    pool = aioredis.ConnectionPool.from_url(redis_url, max_connections=pool_size)
+    async_client = aioredis.Redis(connection_pool=pool)
+
+    payload = encode({"date": "2024-01-15", "total_girls": 120, "stores": [{"shifts": list(range(120))}]})
+    sync_client.setex(CACHE_KEY, 600, payload)
+
+    async def sync_handler():
+        # 従来方式: 同期クライアントでイベントループをブロックする
+        pipe = sync_client.pipeline(transaction=False)
+        for namespace in NAMESPACES:
+            pipe.hmget(_generation_key(namespace), "value", "updated_at")
+        pipe.execute()
+        sync_client.get(CACHE_KEY)
+        await asyncio.sleep(0)
+
+    async def async_handler():
+        # 新方式: asyncioクライアントで世代情報とキャッシュを1往復で取得
+        await load_validator(async_client, make_request(), NAMESPACES, cache_key=CACHE_KEY)
+
+    print(f"{'client':<8} {'conc':>5} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for concurrency in concurrencies:
+        for name, handler in [("sync", sync_handler), ("async", async_handler)]:
+            result = await run_load(handler, concurrency, requests)
+            print(
+                f"{name:<8} {concurrency:>5} {result['rps']:>9.0f} "
+                f"{result['p50']:>8.2f} {result['p95']:>8.2f} {result['p99']:>8.2f}"
+            )
+
+    sync_client.delete(CACHE_KEY)
+    sync_client.close()
+    await pool.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Redis cache path latency benchmark")
+    parser.add_argument("--redis-url", default="redis://localhost:6379")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--pool-size", type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.redis_url, args.concurrency, args.requests, args.pool_size))
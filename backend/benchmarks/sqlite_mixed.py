@@ -0,0 +1,117 @@
+"""
+SQLiteの読み書き混在ベンチマーク
+従来モード（1接続を共有、ロールバックジャーナル）とチューニングモード
+（WAL・読み取り専用プール・単一書き込み接続）で、スクレイパー相当の書き込みを
+流しながら日別シフト取得を同時に発行し、読み取りのrps・p50/p95/p99と書き込み件数を比較する
+
+使い方:
+    cd backend
+    python -m benchmarks.sqlite_mixed --path /tmp/bench.db --concurrency 50 200
+"""
+
+import argparse
+import asyncio
+import os
+from typing import List
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app import models
+from app.crud import ShiftRepository
+from app.database import Base, create_sqlite_engines
+from benchmarks.redis_latency import run_load
+
+DATE = "2024-01-15"
+
+
+def seed(path: str, stores: int, girls_per_store: int) -> None:
+    """ベンチマーク用のデータを作成"""
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        for store_index in range(stores):
+            store_id = f"store-{store_index}"
+            db.add(models.Store(
+                id=store_id, name=f"店舗{store_index}", url="https://example.com",
+                area="秋葉原", open_time="11:00", close_time="22:00", selectors="{}",
+            ))
+            for girl_index in range(girls_per_store):
+                girl = models.Girl(store_id=store_id, name=f"嬢{store_index}-{girl_index}")
+                db.add(girl)
+                db.flush()
+                db.add(models.Shift(
+                    store_id=store_id, girl_id=girl.id, date=DATE,
+                    start_time="18:00", end_time="22:00",
+                ))
+        db.commit()
+    engine.dispose()
+
+
+async def measure(name: str, writer, reader, concurrency: int, requests: int) -> None:
+    """書き込みを流しながら読み取り負荷をかけて結果を出力"""
+    WriteSession = async_sessionmaker(writer, expire_on_commit=False)
+    ReadSession = async_sessionmaker(reader, expire_on_commit=False)
+    writes = 0
+    done = asyncio.Event()
+
+    async def write_loop():
+        # スクレイパーと同じく1件ずつコミットする
+        nonlocal writes
+        while not done.is_set():
+            async with WriteSession() as db:
+                await db.execute(
+                    text("UPDATE shifts SET notes = :notes WHERE id = :id"),
+                    {"notes": str(writes), "id": writes % 100 + 1},
+                )
+                await db.commit()
+            writes += 1
+            await asyncio.sleep(0)
+
+    async def read_handler():
+        async with ReadSession() as db:
+            await ShiftRepository.get_by_date(db, DATE)
+
+    writer_task = asyncio.create_task(write_loop())
+    result = await run_load(read_handler, concurrency, requests)
+    done.set()
+    await writer_task
+
+    print(
+        f"{name:<8} {concurrency:>5} {result['rps']:>9.0f} "
+        f"{result['p50']:>8.2f} {result['p95']:>8.2f} {result['p99']:>8.2f} {writes:>8}"
+    )
+
+
+async def main(path: str, concurrencies: List[int], requests: int) -> None:
+    """同時実行数ごとに従来・チューニングモードを計測"""
+    print(f"{'mode':<8} {'conc':>5} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'writes':>8}")
+    for concurrency in concurrencies:
+        # 従来モード: 1接続を共有し、ロールバックジャーナル
+        legacy = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=StaticPool)
+        async with legacy.begin() as conn:
+            await conn.execute(text("PRAGMA journal_mode = DELETE"))
+        await measure("legacy", legacy, legacy, concurrency, requests)
+        await legacy.dispose()
+
+        writer, reader = create_sqlite_engines(f"sqlite:///{path}")
+        await measure("tuned", writer, reader, concurrency, requests)
+        await reader.dispose()
+        await writer.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite mixed read/write benchmark")
+    parser.add_argument("--path", default="/tmp/concafe-bench.db")
+    parser.add_argument("--stores", type=int, default=5)
+    parser.add_argument("--girls-per-store", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    seed(args.path, args.stores, args.girls_per_store)
+    asyncio.run(main(args.path, args.concurrency, args.requests))